@@ -0,0 +1,160 @@
+"""
+All-sources "Bacon number" analytics over the co-star graph.
+
+Runs a breadth-first search from every person (or a sample of people)
+across a process pool and streams one CSV row per person: number of
+co-stars, number of people reachable, eccentricity and average
+separation. The degree histogram (people per number of co-stars) of
+everyone in the people table, sampled or not, is written to a second
+CSV; co-stars are counted straight from the CSR arrays, not searched.
+
+The read-only CSR arrays are placed in shared memory once and attached
+by every worker, instead of being pickled for each task.
+"""
+
+import argparse
+import csv
+import os
+import random
+import sys
+import time
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+
+import degrees
+from graph import UNREACHABLE, bfs_distances, gather
+
+ARRAYS = ["person_offsets", "person_movies", "movie_offsets", "movie_people"]
+
+# Sources per task handed to a worker
+CHUNK_SIZE = 16
+
+# People whose co-stars are counted at a time
+COSTAR_CHUNK = 65536
+
+# CSR arrays attached from shared memory in each worker
+arrays = {}
+blocks = []
+
+
+def share(graph):
+    """
+    Copies the graph's CSR arrays into shared memory. Returns the blocks
+    (to be closed and unlinked by the caller) and the (name, shape, dtype)
+    needed to attach each array.
+    """
+    shared = []
+    specs = {}
+    for name in ARRAYS:
+        array = np.asarray(getattr(graph, name))
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+        shared.append(block)
+        specs[name] = (block.name, array.shape, array.dtype.str)
+    return shared, specs
+
+
+def attach(specs):
+    """
+    Pool initializer: maps the shared CSR arrays into this worker.
+    """
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def analyze(source):
+    """
+    Returns (source, reachable, eccentricity, average separation)
+    for one person.
+    """
+    distances = bfs_distances(*(arrays[name] for name in ARRAYS), source)
+    reached = distances[distances != UNREACHABLE]
+    reachable = len(reached) - 1
+    eccentricity = int(reached.max())
+    average = float(reached.sum()) / reachable if reachable else 0.0
+    return source, reachable, eccentricity, average
+
+
+def costar_counts(graph):
+    """
+    Returns the number of co-stars of every person: the distinct people
+    across their movies, less themselves.
+    """
+    counts = np.zeros(graph.num_people, dtype=np.int64)
+    for start in range(0, graph.num_people, COSTAR_CHUNK):
+        end = min(start + COSTAR_CHUNK, graph.num_people)
+        people = np.arange(start, end)
+
+        # Every (person, co-star) pair of the chunk, as one integer each
+        movies = gather(graph.person_offsets, graph.person_movies, people)
+        owners = np.repeat(people, np.diff(graph.person_offsets[start:end + 1]))
+        owners = np.repeat(owners, graph.movie_offsets[movies + 1] - graph.movie_offsets[movies])
+        costars = gather(graph.movie_offsets, graph.movie_people, movies)
+        pairs = np.sort(owners.astype(np.int64) * graph.num_people + costars)
+
+        distinct = np.ones(len(pairs), dtype=bool)
+        distinct[1:] = pairs[1:] != pairs[:-1]
+        counts[start:end] = np.bincount(pairs[distinct] // graph.num_people - start,
+                                        minlength=end - start)
+    counts[np.diff(graph.person_offsets) > 0] -= 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--output", default="separation.csv",
+                        help="CSV file for per-person results")
+    parser.add_argument("--histogram", default="degree_histogram.csv",
+                        help="CSV file for the degree histogram")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(),
+                        help="number of worker processes")
+    parser.add_argument("--sample", type=int, default=0, metavar="N",
+                        help="only search from N randomly chosen people")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory, backend="csr")
+    graph = degrees.graph
+    print("Data loaded.", file=sys.stderr)
+
+    sources = list(range(graph.num_people))
+    if args.sample:
+        sources = sorted(random.Random(args.seed).sample(sources, min(args.sample, len(sources))))
+
+    costars = costar_counts(graph)
+    shared, specs = share(graph)
+    start = time.perf_counter()
+    try:
+        with open(args.output, "w", newline="", encoding="utf-8") as f, \
+                Pool(args.processes, initializer=attach, initargs=(specs,)) as pool:
+            writer = csv.writer(f)
+            writer.writerow(["person_id", "name", "costars", "reachable",
+                             "eccentricity", "average_separation"])
+            results = pool.imap_unordered(analyze, sources, chunksize=CHUNK_SIZE)
+            for done, (person, reachable, eccentricity, average) in enumerate(results, 1):
+                writer.writerow([graph.person_ids[person], graph.person_names[person],
+                                 int(costars[person]), reachable, eccentricity, f"{average:.4f}"])
+                if done % 1000 == 0 or done == len(sources):
+                    elapsed = time.perf_counter() - start
+                    print(f"{done}/{len(sources)} people, {done / elapsed:.1f} searches/s",
+                          file=sys.stderr)
+    finally:
+        for block in shared:
+            block.close()
+            block.unlink()
+
+    with open(args.histogram, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["costars", "people"])
+        histogram = np.bincount(costars)
+        for count in np.flatnonzero(histogram).tolist():
+            writer.writerow([count, int(histogram[count])])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark the frontiers in util.py against the original list-based ones.
+
+Runs a breadth-first search over a random graph with a million edges,
+once with the current QueueFrontier and once with the slicing/scanning
+frontier that util.py used to ship. The old frontier is quadratic, so it
+is stopped after a time budget and compared by nodes explored per second.
+"""
+
+import random
+import sys
+import time
+
+from util import Node, QueueFrontier
+
+EDGES = 1_000_000
+EDGES_PER_NODE = 10
+BUDGET = 10.0
+
+
+class ListQueueFrontier():
+    """
+    The original QueueFrontier: list slicing on remove, linear contains.
+    """
+    def __init__(self):
+        self.frontier = []
+
+    def add(self, node):
+        self.frontier.append(node)
+
+    def contains_state(self, state):
+        return any(node.state == state for node in self.frontier)
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        node = self.frontier[0]
+        self.frontier = self.frontier[1:]
+        return node
+
+
+def random_graph(nodes, edges, seed=0):
+    """
+    Return an adjacency list of a random undirected graph.
+    """
+    rng = random.Random(seed)
+    graph = [[] for _ in range(nodes)]
+    for _ in range(edges):
+        a = rng.randrange(nodes)
+        b = rng.randrange(nodes)
+        graph[a].append(b)
+        graph[b].append(a)
+    return graph
+
+
+def bfs(graph, frontier, budget):
+    """
+    Explore the whole component of node 0, stopping after `budget` seconds.
+    Returns the number of nodes explored and the time taken.
+    """
+    start = time.perf_counter()
+    frontier.add(Node(state=0, parent=None, action=None))
+    explored = set()
+    while not frontier.empty():
+        node = frontier.remove()
+        explored.add(node.state)
+        for state in graph[node.state]:
+            if not frontier.contains_state(state) and state not in explored:
+                frontier.add(Node(state=state, parent=node, action=None))
+        if time.perf_counter() - start > budget:
+            break
+    return len(explored), time.perf_counter() - start
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python bench_frontier.py [edges]")
+    edges = int(sys.argv[1]) if len(sys.argv) == 2 else EDGES
+    nodes = max(edges // EDGES_PER_NODE, 1)
+
+    print(f"Building random graph: {nodes} nodes, {edges} edges...")
+    graph = random_graph(nodes, edges)
+
+    explored, elapsed = bfs(graph, QueueFrontier(), budget=float("inf"))
+    new_rate = explored / elapsed
+    print(f"deque frontier: {explored} nodes in {elapsed:.2f}s "
+          f"({new_rate:,.0f} nodes/s)")
+
+    explored, elapsed = bfs(graph, ListQueueFrontier(), budget=BUDGET)
+    old_rate = explored / elapsed
+    print(f"list frontier:  {explored} nodes in {elapsed:.2f}s "
+          f"({old_rate:,.0f} nodes/s, stopped after {BUDGET:.0f}s budget)")
+
+    print(f"Speedup: {new_rate / old_rate:,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
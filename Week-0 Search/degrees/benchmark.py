@@ -0,0 +1,91 @@
+"""
+Benchmark load_data and shortest_path on a dataset.
+
+Loads the dataset with the chosen backend, runs a fixed, seeded set of
+queries and reports load time, peak resident memory, people explored and
+query latency percentiles. Results are printed and can be saved as JSON
+to compare runs. Generate large datasets with generate.py.
+"""
+
+import argparse
+import json
+import random
+import resource
+import sys
+import time
+
+import degrees
+
+QUERIES = 200
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--backend", choices=["dict", "csr"], default="dict")
+    parser.add_argument("--no-snapshot", action="store_true")
+    parser.add_argument("--unidirectional", action="store_true")
+    parser.add_argument("--landmarks", type=int, default=0, metavar="K")
+    parser.add_argument("--queries", type=int, default=QUERIES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    degrees.load_data(args.directory, backend=args.backend, use_snapshot=not args.no_snapshot)
+    if args.landmarks:
+        degrees.load_landmarks(args.directory, args.landmarks)
+    load_time = time.perf_counter() - start
+
+    # The query set depends only on the seed and the people in the dataset
+    person_ids = sorted(degrees.people)
+    rng = random.Random(args.seed)
+    queries = [(rng.choice(person_ids), rng.choice(person_ids)) for _ in range(args.queries)]
+
+    latencies = []
+    explored = []
+    connected = 0
+    for source, target in queries:
+        start = time.perf_counter()
+        path = degrees.shortest_path(source, target, bidirectional=not args.unidirectional)
+        latencies.append(time.perf_counter() - start)
+        explored.append(degrees.num_explored)
+        connected += path is not None
+
+    results = {
+        "directory": args.directory,
+        "backend": args.backend,
+        "mode": "landmarks" if args.landmarks else
+                "unidirectional" if args.unidirectional else "bidirectional",
+        "people": len(degrees.people),
+        "movies": len(degrees.movies),
+        "load_seconds": round(load_time, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "queries": len(queries),
+        "connected": connected,
+        "explored_mean": round(sum(explored) / len(explored), 1),
+        "explored_max": max(explored),
+    }
+    for name, fraction in [("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0)]:
+        results[f"latency_{name}_ms"] = round(percentile(latencies, fraction) * 1000, 3)
+
+    for key, value in results.items():
+        print(f"{key}: {value}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
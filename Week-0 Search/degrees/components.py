@@ -0,0 +1,89 @@
+"""
+Connected components of the co-star graph, by union-find over the
+stars table: everyone who starred in the same movie is joined together.
+"""
+
+
+class DisjointSet():
+    def __init__(self, size):
+        self.parent = list(range(size))
+        self.size = [1] * size
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+
+            # Path halving: point every other node at its grandparent
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a, b):
+        a = self.find(a)
+        b = self.find(b)
+        if a == b:
+            return a
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        return a
+
+
+def label_components(num_people, casts):
+    """
+    Returns (labels, sizes) for people numbered 0 to num_people - 1, where
+    `casts` is an iterable of lists of people who starred together.
+
+    labels[person] is the component of each person, numbered from 0 in
+    order of each component's first person, and sizes[c] is the number
+    of people in component c.
+    """
+    disjoint_set = DisjointSet(num_people)
+    for cast in casts:
+        for person in cast[1:]:
+            disjoint_set.union(cast[0], person)
+
+    labels = []
+    sizes = []
+    component_of_root = {}
+    for person in range(num_people):
+        root = disjoint_set.find(person)
+        if root not in component_of_root:
+            component_of_root[root] = len(sizes)
+            sizes.append(0)
+        component = component_of_root[root]
+        labels.append(component)
+        sizes[component] += 1
+    return labels, sizes
+
+
+def merge_components(sizes, casts):
+    """
+    Joins the components of people who now star together. `casts` holds
+    the component of each member of each cast, and `sizes` (indexed by
+    component) is updated in place.
+
+    Returns a dict mapping each merged-away component to the component
+    that absorbed it; relabelling people is left to the caller.
+    """
+    parents = {}
+
+    def find(component):
+        while parents.get(component, component) != component:
+            component = parents[component]
+        return component
+
+    for cast in casts:
+        for component in cast[1:]:
+            a = find(cast[0])
+            b = find(component)
+            if a == b:
+                continue
+            if sizes[a] < sizes[b]:
+                a, b = b, a
+            parents[b] = a
+            sizes[a] += sizes[b]
+            sizes[b] = 0
+
+    return {component: find(component) for component in parents}
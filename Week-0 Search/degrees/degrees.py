@@ -1,6 +1,11 @@
+import argparse
 import csv
+import math
+import os
 import sys
 
+import paths
+from components import label_components, merge_components
 from util import Node, StackFrontier, QueueFrontier
 
 # Maps names to a set of corresponding person_ids
@@ -12,11 +17,41 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Maps person_ids to the id of their connected component
+components = {}
 
-def load_data(directory):
+# Number of people in each connected component
+component_sizes = []
+
+# Number of people expanded by the most recent search
+num_explored = 0
+
+# Compact graph.Graph backend, used instead of the dicts above when loaded
+graph = None
+
+# landmarks.LandmarkIndex over the graph backend, if loaded
+landmark_index = None
+
+# name_index.NameIndex over `names`, built (or read from the snapshot) on load
+name_index = None
+
+
+def load_data(directory, backend="dict", use_snapshot=True):
     """
     Load data from CSV files into memory.
+
+    With backend="csr", the stars table is held in a compact integer graph
+    (see graph.py) and `people`/`movies` become read-only views over it.
+    The csr backend also caches the parsed data in a binary snapshot
+    (see snapshot.py) unless `use_snapshot` is False.
     """
+    global name_index
+    from name_index import NameIndex
+
+    if backend == "csr":
+        load_graph(directory, use_snapshot)
+        return
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -51,15 +86,205 @@ def load_data(directory):
             except KeyError:
                 pass
 
+    # Label connected components
+    person_ids = list(people)
+    index = {person_id: i for i, person_id in enumerate(person_ids)}
+    labels, sizes = label_components(
+        len(person_ids),
+        ([index[person_id] for person_id in movie["stars"]] for movie in movies.values())
+    )
+    components.update(zip(person_ids, labels))
+    component_sizes.extend(sizes)
+
+    name_index = NameIndex.build(names, movie_count)
+
+
+def load_graph(directory, use_snapshot=True):
+    """
+    Load data into a graph.Graph, from the snapshot in `directory` if it
+    is up to date, and otherwise from the CSV files.
+    """
+    global graph, people, movies, names, name_index
+    from graph import Graph, PeopleView, MoviesView
+    from name_index import NameIndex
+    import snapshot
+
+    loaded = snapshot.load(directory) if use_snapshot else None
+    if loaded is not None:
+        graph, names, arrays = loaded
+        name_index = NameIndex(names, movie_count, names.keys_table, *arrays)
+    else:
+        graph = Graph.from_csv(directory)
+        names = {}
+        for person_id, name in zip(graph.person_ids, graph.person_names):
+            names.setdefault(name.lower(), set()).add(person_id)
+        name_index = NameIndex.build(names, movie_count)
+
+        # A read-only dataset directory just means no snapshot
+        if use_snapshot:
+            try:
+                snapshot.save(directory, graph, names, name_index)
+            except OSError:
+                pass
+
+    people = PeopleView(graph)
+    movies = MoviesView(graph)
+
+
+def load_landmarks(directory, k):
+    """
+    Load the landmark index for the graph in `directory`,
+    building and saving it first if needed.
+    """
+    global landmark_index
+    import landmarks
+
+    if graph is None:
+        raise ValueError("landmarks require the csr backend")
+    landmark_index = landmarks.load_or_build(directory, graph, k)
+
+
+def read_delta(directory):
+    """
+    Reads the rows of people.csv, movies.csv and stars.csv in `directory`,
+    any of which may be missing. Returns (people, movies, stars) lists.
+
+    Raises FileNotFoundError if the directory does not exist, and
+    ValueError if it holds none of the three files.
+    """
+    if not os.path.isdir(directory):
+        raise FileNotFoundError(f"no delta directory {directory}")
+    tables = []
+    found = False
+    for filename in ["people.csv", "movies.csv", "stars.csv"]:
+        try:
+            with open(f"{directory}/{filename}", encoding="utf-8") as f:
+                tables.append(list(csv.DictReader(f)))
+            found = True
+        except FileNotFoundError:
+            tables.append([])
+    if not found:
+        raise ValueError(f"{directory} has no people.csv, movies.csv or stars.csv")
+    return tuple(tables)
+
+
+def apply_delta(new_people, new_movies, new_stars):
+    """
+    Adds rows from people.csv, movies.csv and stars.csv files to the
+    loaded data without reloading it, keeping the connected components,
+    landmark index and name index up to date.
+
+    Star rows that add nothing (see filter_stars) are ignored. Returns
+    the set of components that gained connections. Shortest paths
+    between people outside them are unchanged.
+    """
+    new_stars = filter_stars(new_people, new_movies, new_stars)
+    added_names = []
+    for row in new_people:
+        if row["id"] not in people:
+            names.setdefault(row["name"].lower(), set()).add(row["id"])
+            added_names.append(row["name"].lower())
+    if added_names:
+        name_index.add(added_names)
+
+    if graph is not None:
+        casts = graph.extend(new_people, new_movies, new_stars)
+        if landmark_index is not None:
+            landmark_index.update(graph, list(casts.values()))
+        return {int(graph.components[cast[0]]) for cast in casts.values()}
+
+    for row in new_people:
+        if row["id"] not in people:
+            people[row["id"]] = {"name": row["name"], "birth": row["birth"], "movies": set()}
+            components[row["id"]] = len(component_sizes)
+            component_sizes.append(1)
+    for row in new_movies:
+        if row["id"] not in movies:
+            movies[row["id"]] = {"title": row["title"], "year": row["year"], "stars": set()}
+
+    casts = {}
+    for row in new_stars:
+        people[row["person_id"]]["movies"].add(row["movie_id"])
+        movies[row["movie_id"]]["stars"].add(row["person_id"])
+        casts[row["movie_id"]] = list(movies[row["movie_id"]]["stars"])
+
+    merged = merge_components(
+        component_sizes,
+        [[components[person_id] for person_id in cast] for cast in casts.values()]
+    )
+    if merged:
+        for person_id, component in components.items():
+            if component in merged:
+                components[person_id] = merged[component]
+    return {components[cast[0]] for cast in casts.values()}
+
+
+def filter_stars(new_people, new_movies, new_stars):
+    """
+    Returns the rows of stars.csv that would change the loaded data:
+    those whose person and movie are loaded or among the new rows, and
+    that do not repeat a pair already loaded or earlier in `new_stars`.
+    """
+    new_person_ids = {row["id"] for row in new_people}
+    new_movie_ids = {row["id"] for row in new_movies}
+    pairs = set()
+    rows = []
+    for row in new_stars:
+        pair = (row["person_id"], row["movie_id"])
+        if pair in pairs:
+            continue
+        person_known = pair[0] in people
+        movie_known = pair[1] in movies
+        if not (person_known or pair[0] in new_person_ids):
+            continue
+        if not (movie_known or pair[1] in new_movie_ids):
+            continue
+        if person_known and movie_known and starred(*pair):
+            continue
+        pairs.add(pair)
+        rows.append(row)
+    return rows
+
+
+def starred(person_id, movie_id):
+    """
+    Returns True if the loaded data has the person starring in the movie.
+    """
+    if graph is not None:
+        movie = graph.movie_index[movie_id]
+        return bool((graph.movies_for_person(graph.person_index[person_id]) == movie).any())
+    return movie_id in people[person_id]["movies"]
+
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--unidirectional", action="store_true",
+                        help="search from the source only")
+    parser.add_argument("--backend", choices=["dict", "csr"], default="dict",
+                        help="in-memory representation of the data")
+    parser.add_argument("--no-snapshot", action="store_true",
+                        help="always parse the CSV files (csr backend only)")
+    parser.add_argument("--landmarks", type=int, default=0, metavar="K",
+                        help="guide searches with K landmarks (csr backend only)")
+    parser.add_argument("--estimate", action="store_true",
+                        help="only print bounds on the separation (needs --landmarks)")
+    parser.add_argument("--all-shortest", action="store_true",
+                        help="print every shortest path")
+    parser.add_argument("--alternatives", type=int, default=0, metavar="K",
+                        help="print the K shortest paths, shortest first")
+    args = parser.parse_args()
+    directory = args.directory
+    if args.landmarks and args.backend != "csr":
+        parser.error("--landmarks requires --backend csr")
+    if args.estimate and not args.landmarks:
+        parser.error("--estimate requires --landmarks")
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(directory, backend=args.backend, use_snapshot=not args.no_snapshot)
+    if args.landmarks:
+        load_landmarks(directory, args.landmarks)
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -69,29 +294,68 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    if args.estimate:
+        lower, upper = separation_bounds(source, target)
+        if lower == math.inf:
+            print("Not connected.")
+        elif lower == upper:
+            print(f"{lower} degrees of separation.")
+        elif upper == math.inf:
+            print(f"At least {lower} degrees of separation, if connected.")
+        else:
+            print(f"Between {lower} and {upper} degrees of separation.")
+        return
 
-    if path is None:
-        print("Not connected.")
+    if args.all_shortest:
+        chains = all_shortest_paths(source, target)
+    elif args.alternatives:
+        chains = k_shortest_paths(source, target, args.alternatives)
     else:
-        degrees = len(path)
-        print(f"{degrees} degrees of separation.")
-        path = [(None, source)] + path
-        for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
-            print(f"{i + 1}: {person1} and {person2} starred in {movie}")
+        chains = [shortest_path(source, target, bidirectional=not args.unidirectional)]
+
+    found = False
+    for path in chains:
+        if path is None:
+            break
+        if found:
+            print()
+        found = True
+        print_path(source, path)
+    if not found:
+        print("Not connected.")
 
 
-def shortest_path(source, target):
+def print_path(source, path):
+    """
+    Prints a path from the source, one movie per line.
+    """
+    degrees = len(path)
+    print(f"{degrees} degrees of separation.")
+    path = [(None, source)] + path
+    for i in range(degrees):
+        person1 = people[path[i][1]]["name"]
+        person2 = people[path[i + 1][1]]["name"]
+        movie = movies[path[i + 1][0]]["title"]
+        print(f"{i + 1}: {person1} and {person2} starred in {movie}")
+
+
+def shortest_path(source, target, bidirectional=True):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
     If no possible path, returns None.
     """
+    if graph is not None:
+        return graph_path(source, target, bidirectional)
+
+    global num_explored
     num_explored = 0
+    if not connected(source, target):
+        return None
+    if bidirectional:
+        return bidirectional_path(source, target)
+
     start = Node(state=source, parent=None, action=None)
     frontier = QueueFrontier()
     frontier.add(start)
@@ -130,37 +394,277 @@ def shortest_path(source, target):
     raise NotImplementedError
 
 
+def bidirectional_path(source, target):
+    """
+    Breadth-first search from the source and the target at the same time,
+    always expanding one full level of whichever frontier is smaller.
+
+    Returns the same (movie_id, person_id) path as shortest_path.
+    """
+    global num_explored
+    num_explored = 0
+    if source == target:
+        return []
+
+    # Maps each person reached to the (movie_id, person_id) step leading
+    # back towards the source (forward) or on towards the target (backward)
+    forward = {source: None}
+    backward = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    while forward_frontier and backward_frontier:
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, meeting = expand_level(forward_frontier, forward, backward)
+        else:
+            backward_frontier, meeting = expand_level(backward_frontier, backward, forward)
+
+        # The first person reached by both searches lies on a shortest path
+        if meeting is not None:
+            solution = []
+            person_id = meeting
+            while forward[person_id] is not None:
+                movie_id, parent_id = forward[person_id]
+                solution.append((movie_id, person_id))
+                person_id = parent_id
+            solution.reverse()
+            person_id = meeting
+            while backward[person_id] is not None:
+                movie_id, person_id = backward[person_id]
+                solution.append((movie_id, person_id))
+            return solution
+
+    return None
+
+
+def expand_level(frontier, parents, other):
+    """
+    Expands every person in `frontier`, recording newly reached people in
+    `parents`. Returns the next frontier and the first person found that
+    is already in `other`, or None if the searches have not met.
+    """
+    global num_explored
+    next_frontier = []
+    for person_id in frontier:
+        num_explored += 1
+        for movie_id, neighbor_id in neighbors_for_person(person_id):
+            if neighbor_id in parents:
+                continue
+            parents[neighbor_id] = (movie_id, person_id)
+            if neighbor_id in other:
+                return next_frontier, neighbor_id
+            next_frontier.append(neighbor_id)
+    return next_frontier, None
+
+
+def graph_path(source, target, bidirectional=True):
+    """
+    Runs shortest_path on the graph backend, translating IMDB ids
+    to and from the graph's integer ids. The search is pruned by the
+    landmark index when it is loaded.
+    """
+    global num_explored
+    source = graph.person_index[source]
+    target = graph.person_index[target]
+    if landmark_index is not None:
+        path = landmark_index.shortest_path(graph, source, target)
+        num_explored = landmark_index.num_explored
+    else:
+        path = graph.shortest_path(source, target, bidirectional)
+        num_explored = graph.num_explored
+    if path is None:
+        return None
+    return [(graph.movie_ids[movie], graph.person_ids[person]) for movie, person in path]
+
+
+def all_shortest_paths(source, target):
+    """
+    Yields every distinct shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, one at a time.
+    """
+    if not connected(source, target):
+        return
+    if graph is None:
+        yield from paths.all_shortest_paths(neighbors_for_person, source, target)
+        return
+    for path in paths.all_shortest_paths(
+            graph.neighbors, graph.person_index[source], graph.person_index[target]):
+        yield [(graph.movie_ids[movie], graph.person_ids[person]) for movie, person in path]
+
+
+def k_shortest_paths(source, target, k=None):
+    """
+    Yields up to k lists of (movie_id, person_id) pairs connecting the
+    source to the target without repeating anyone, shortest first.
+    """
+    if not connected(source, target):
+        return
+    if graph is None:
+        yield from paths.k_shortest_paths(neighbors_for_person, source, target, k)
+        return
+    for path in paths.k_shortest_paths(
+            graph.neighbors, graph.person_index[source], graph.person_index[target], k):
+        yield [(graph.movie_ids[movie], graph.person_ids[person]) for movie, person in path]
+
+
+def connected(source, target):
+    """
+    Returns True if the two people are in the same connected component.
+    """
+    if graph is not None:
+        return bool(graph.connected(graph.person_index[source], graph.person_index[target]))
+    return components[source] == components[target]
+
+
+def component_size(person_id):
+    """
+    Returns the number of people connected to a person, including themselves.
+    """
+    if graph is not None:
+        return graph.component_size(graph.person_index[person_id])
+    return component_sizes[components[person_id]]
+
+
+def component_id(person_id):
+    """
+    Returns the id of a person's connected component.
+    """
+    if graph is not None:
+        return int(graph.components[graph.person_index[person_id]])
+    return components[person_id]
+
+
+def separation_bounds(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between
+    two people from the landmark index, without searching.
+    Both bounds are math.inf if they are not connected.
+    """
+    return landmark_index.bounds(graph.person_index[source], graph.person_index[target])
+
+
+def search_tree(source):
+    """
+    Breadth-first search over everyone connected to the source.
+
+    Returns a tree for path_in_tree to answer any target from.
+    """
+    if graph is not None:
+        return graph.search_tree(graph.person_index[source])
+
+    parents = {source: None}
+    frontier = [source]
+    while frontier:
+        next_frontier = []
+        for person_id in frontier:
+            for movie_id, neighbor_id in neighbors_for_person(person_id):
+                if neighbor_id not in parents:
+                    parents[neighbor_id] = (movie_id, person_id)
+                    next_frontier.append(neighbor_id)
+        frontier = next_frontier
+    return parents
+
+
+def path_in_tree(tree, target):
+    """
+    Returns the list of (movie_id, person_id) pairs from the root of a
+    search_tree to the target, or None if the target is not in the tree.
+    """
+    if graph is not None:
+        path = tree.path_to(graph.person_index[target])
+        if path is None:
+            return None
+        return [(graph.movie_ids[movie], graph.person_ids[other]) for movie, other in path]
+
+    if target not in tree:
+        return None
+    solution = []
+    person_id = target
+    while tree[person_id] is not None:
+        movie_id, parent_id = tree[person_id]
+        solution.append((movie_id, person_id))
+        person_id = parent_id
+    solution.reverse()
+    return solution
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    If no name matches exactly, offers the closest names instead.
     """
     person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
-        return None
+        person_ids = suggest_people(name)
+        if len(person_ids) == 0:
+            return None
+        print(f"No exact match for '{name}'. Did you mean:")
+        return choose_person(person_ids)
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
-        for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
-            print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
-        try:
-            person_id = input("Intended Person ID: ")
-            if person_id in person_ids:
-                return person_id
-        except ValueError:
-            pass
-        return None
+        return choose_person(person_ids)
     else:
         return person_ids[0]
 
 
+def choose_person(person_ids):
+    """
+    Lists the given people and asks which one was intended.
+    """
+    for person_id in person_ids:
+        person = people[person_id]
+        name = person["name"]
+        birth = person["birth"]
+        print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
+    try:
+        person_id = input("Intended Person ID: ")
+        if person_id in person_ids:
+            return person_id
+    except ValueError:
+        pass
+    return None
+
+
+def suggest_people(name, limit=10):
+    """
+    Returns up to `limit` person_ids with names close to or starting
+    with `name`, most movies first.
+    """
+    global name_index
+    from name_index import NameIndex
+
+    if name_index is None:
+        name_index = NameIndex.build(names, movie_count)
+    suggestions = []
+    for person_id in name_index.fuzzy(name, limit=limit) + name_index.prefix(name, limit=limit):
+        if person_id not in suggestions:
+            suggestions.append(person_id)
+    return suggestions[:limit]
+
+
+def movie_count(person_id):
+    """
+    Returns the number of movies a person starred in.
+    """
+    if graph is not None:
+        person = graph.person_index[person_id]
+        return int(graph.person_offsets[person + 1] - graph.person_offsets[person])
+    return len(people[person_id]["movies"])
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        person = graph.person_index[person_id]
+        return {
+            (graph.movie_ids[movie], graph.person_ids[other])
+            for movie, other in graph.neighbors(person)
+        }
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
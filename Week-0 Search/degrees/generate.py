@@ -0,0 +1,130 @@
+"""
+Generate a synthetic IMDB-like dataset for degrees.py.
+
+Writes people.csv, movies.csv and stars.csv in the same format as the
+`small` and `large` datasets. Cast sizes follow a power law (most movies
+have a few credited stars, a few have hundreds), and so does how often
+each person is cast, so the co-star graph has the hubs and long tail of
+the real data. Rows are generated and written in chunks, so tens of
+millions of rows need little memory.
+"""
+
+import argparse
+import csv
+import os
+
+import numpy as np
+
+FIRST_NAMES = [
+    "James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael",
+    "Linda", "William", "Elizabeth", "David", "Barbara", "Richard", "Susan",
+    "Joseph", "Jessica", "Thomas", "Sarah", "Charles", "Karen", "Daniel",
+    "Nancy", "Matthew", "Lisa", "Anthony", "Betty", "Mark", "Margaret",
+    "Akira", "Ingrid", "Marcello", "Sophia", "Gerard", "Isabelle", "Kenji",
+    "Priya", "Rahul", "Mei", "Lars", "Astrid", "Pedro", "Lucia",
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller",
+    "Davis", "Rodriguez", "Martinez", "Hernandez", "Lopez", "Gonzalez",
+    "Wilson", "Anderson", "Taylor", "Moore", "Jackson", "Martin", "Lee",
+    "Thompson", "White", "Harris", "Clark", "Lewis", "Robinson", "Walker",
+    "Kurosawa", "Bergman", "Mastroianni", "Loren", "Depardieu", "Huppert",
+    "Watanabe", "Kapoor", "Khan", "Wong", "Nielsen", "Larsen", "Almodovar",
+]
+TITLE_WORDS = [
+    "Night", "Day", "Return", "Last", "First", "Dark", "Light", "City",
+    "River", "Secret", "Love", "War", "Storm", "Summer", "Winter", "Road",
+    "House", "King", "Queen", "Star", "Shadow", "Fire", "Ice", "Blood",
+    "Dream", "Silent", "Lost", "Golden", "Iron", "Glass", "Wild", "Broken",
+]
+
+# Shape and scale of the Pareto distribution of cast sizes, and its cap
+CAST_ALPHA = 1.5
+CAST_SCALE = 3
+MAX_CAST = 1000
+
+# Exponent of the Zipf distribution of how often each person is cast
+POPULARITY_EXPONENT = 0.8
+
+CHUNK = 100_000
+
+
+def write_people(directory, count, rng):
+    with open(os.path.join(directory, "people.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for start in range(0, count, CHUNK):
+            size = min(CHUNK, count - start)
+            first = rng.integers(len(FIRST_NAMES), size=size)
+            last = rng.integers(len(LAST_NAMES), size=size)
+            suffix = rng.integers(1000, size=size)
+            births = rng.integers(1900, 2010, size=size)
+            writer.writerows(
+                (start + i + 1,
+                 f"{FIRST_NAMES[first[i]]} {LAST_NAMES[last[i]]} {suffix[i]}",
+                 births[i] if suffix[i] % 10 else "")
+                for i in range(size)
+            )
+
+
+def write_movies(directory, count, rng):
+    with open(os.path.join(directory, "movies.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for start in range(0, count, CHUNK):
+            size = min(CHUNK, count - start)
+            words = rng.integers(len(TITLE_WORDS), size=(size, 2))
+            years = rng.integers(1920, 2024, size=size)
+            writer.writerows(
+                (start + i + 1,
+                 f"{TITLE_WORDS[words[i, 0]]} {TITLE_WORDS[words[i, 1]]}",
+                 years[i])
+                for i in range(size)
+            )
+
+
+def write_stars(directory, people, movies, rng):
+    """
+    Writes the cast of every movie and returns the number of rows.
+    """
+    # People are drawn by inverting the cumulative Zipf weights, in a
+    # shuffled order so that popular people are spread across the ids
+    weights = 1.0 / np.arange(1, people + 1) ** POPULARITY_EXPONENT
+    cumulative = np.cumsum(weights)
+    cumulative /= cumulative[-1]
+    order = rng.permutation(people) + 1
+
+    rows = 0
+    with open(os.path.join(directory, "stars.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for start in range(0, movies, CHUNK):
+            size = min(CHUNK, movies - start)
+            casts = (rng.pareto(CAST_ALPHA, size=size) + 1) * CAST_SCALE
+            casts = np.minimum(casts, MAX_CAST).astype(np.int64)
+            movie_ids = np.repeat(np.arange(start + 1, start + size + 1), casts)
+            ranks = np.searchsorted(cumulative, rng.random(len(movie_ids)))
+            person_ids = order[np.minimum(ranks, people - 1)]
+            writer.writerows(zip(person_ids.tolist(), movie_ids.tolist()))
+            rows += len(movie_ids)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory")
+    parser.add_argument("--people", type=int, default=1_000_000)
+    parser.add_argument("--movies", type=int, default=300_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.directory, exist_ok=True)
+    rng = np.random.default_rng(args.seed)
+    write_people(args.directory, args.people, rng)
+    write_movies(args.directory, args.movies, rng)
+    rows = write_stars(args.directory, args.people, args.movies, rng)
+    print(f"Wrote {args.people} people, {args.movies} movies and {rows} stars to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
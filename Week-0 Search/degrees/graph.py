@@ -0,0 +1,595 @@
+"""
+Compact graph backend for degrees.py.
+
+People and movies are interned to dense integers, and the stars table is
+kept as two CSR (compressed sparse row) adjacency structures in NumPy
+arrays: person -> movies and movie -> people. Each structure is an
+`offsets` array and an `indices` array, so the movies of person `p` are
+`person_movies[person_offsets[p]:person_offsets[p + 1]]`.
+"""
+
+import csv
+from array import array
+from collections.abc import Mapping
+from functools import cached_property
+
+import numpy as np
+
+from components import label_components, merge_components
+
+# Distance recorded by Graph.distances for people not connected to the source
+UNREACHABLE = 255
+
+
+class Graph():
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_people,
+                 components=None, component_sizes=None, person_index=None, movie_index=None):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+
+        # Connected component of each person, and the size of each component
+        if components is None:
+            labels, sizes = label_components(
+                len(person_ids),
+                (self.people_for_movie(movie).tolist() for movie in range(len(movie_ids)))
+            )
+            components = np.array(labels, dtype=np.int32)
+            component_sizes = np.array(sizes, dtype=np.int64)
+        self.components = components
+        self.component_sizes = component_sizes
+
+        # Maps from ids to positions, built from the id lists when first used
+        # unless given (see snapshot.py)
+        if person_index is not None:
+            self.person_index = person_index
+        if movie_index is not None:
+            self.movie_index = movie_index
+
+        # Number of people expanded by the most recent search
+        self.num_explored = 0
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Load people.csv, movies.csv and stars.csv from `directory`.
+        """
+        person_ids, person_names, person_births = [], [], []
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                person_ids.append(row["id"])
+                person_names.append(row["name"])
+                person_births.append(row["birth"])
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+
+        movie_ids, movie_titles, movie_years = [], [], []
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                movie_ids.append(row["id"])
+                movie_titles.append(row["title"])
+                movie_years.append(row["year"])
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+        # Collect (person, movie) pairs as packed integers
+        star_people = array("i")
+        star_movies = array("i")
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                try:
+                    person = person_index[row["person_id"]]
+                    movie = movie_index[row["movie_id"]]
+                except KeyError:
+                    continue
+                star_people.append(person)
+                star_movies.append(movie)
+
+        person_offsets, person_movies = build_csr(
+            np.frombuffer(star_people, dtype=np.int32),
+            np.frombuffer(star_movies, dtype=np.int32),
+            len(person_ids), len(movie_ids)
+        )
+        movie_offsets, movie_people = build_csr(
+            np.frombuffer(star_movies, dtype=np.int32),
+            np.frombuffer(star_people, dtype=np.int32),
+            len(movie_ids), len(person_ids)
+        )
+        return cls(person_ids, person_names, person_births,
+                   movie_ids, movie_titles, movie_years,
+                   person_offsets, person_movies, movie_offsets, movie_people)
+
+    def extend(self, people, movies, stars):
+        """
+        Adds rows from people.csv, movies.csv and stars.csv files to the
+        graph, rebuilding the adjacency arrays and merging components.
+        People and movies already in the graph are skipped.
+
+        Returns a dict mapping each movie that gained stars to its cast.
+        """
+        person_index = self.person_index
+        movie_index = self.movie_index
+        num_people = self.num_people
+        for row in people:
+            if row["id"] not in person_index:
+                person_index[row["id"]] = len(self.person_ids)
+                self.person_ids.append(row["id"])
+                self.person_names.append(row["name"])
+                self.person_births.append(row["birth"])
+        for row in movies:
+            if row["id"] not in movie_index:
+                movie_index[row["id"]] = len(self.movie_ids)
+                self.movie_ids.append(row["id"])
+                self.movie_titles.append(row["title"])
+                self.movie_years.append(row["year"])
+
+        star_people = []
+        star_movies = []
+        for row in stars:
+            try:
+                star_people.append(person_index[row["person_id"]])
+                star_movies.append(movie_index[row["movie_id"]])
+            except KeyError:
+                continue
+
+        # Rebuild both CSR structures from the old and new (person, movie) pairs
+        old_people = np.repeat(np.arange(num_people), np.diff(self.person_offsets))
+        all_people = np.concatenate([old_people, star_people]).astype(np.int32)
+        all_movies = np.concatenate([self.person_movies, star_movies]).astype(np.int32)
+        self.person_offsets, self.person_movies = build_csr(
+            all_people, all_movies, self.num_people, self.num_movies)
+        self.movie_offsets, self.movie_people = build_csr(
+            all_movies, all_people, self.num_movies, self.num_people)
+
+        # New people start in components of their own
+        added = self.num_people - num_people
+        sizes = len(self.component_sizes)
+        self.components = np.concatenate([
+            self.components, np.arange(sizes, sizes + added, dtype=np.int32)])
+        self.component_sizes = np.concatenate([
+            self.component_sizes, np.ones(added, dtype=np.int64)])
+
+        casts = {movie: self.people_for_movie(movie).tolist() for movie in set(star_movies)}
+        merged = merge_components(
+            self.component_sizes,
+            [self.components[cast].tolist() for cast in casts.values()]
+        )
+        if merged:
+            relabel = np.arange(len(self.component_sizes), dtype=np.int32)
+            relabel[list(merged)] = list(merged.values())
+            self.components = relabel[self.components]
+        return casts
+
+    @cached_property
+    def person_index(self):
+        return {person_id: i for i, person_id in enumerate(self.person_ids)}
+
+    @cached_property
+    def movie_index(self):
+        return {movie_id: i for i, movie_id in enumerate(self.movie_ids)}
+
+    @property
+    def num_people(self):
+        return len(self.person_ids)
+
+    @property
+    def num_movies(self):
+        return len(self.movie_ids)
+
+    def movies_for_person(self, person):
+        return self.person_movies[self.person_offsets[person]:self.person_offsets[person + 1]]
+
+    def people_for_movie(self, movie):
+        return self.movie_people[self.movie_offsets[movie]:self.movie_offsets[movie + 1]]
+
+    def connected(self, a, b):
+        return self.components[a] == self.components[b]
+
+    def component_size(self, person):
+        return int(self.component_sizes[self.components[person]])
+
+    def neighbors(self, person):
+        """
+        Returns (movie, person) pairs of integers for people
+        who starred with `person`.
+        """
+        return [
+            (movie, other)
+            for movie in self.movies_for_person(person).tolist()
+            for other in self.people_for_movie(movie).tolist()
+        ]
+
+    def distances(self, source):
+        """
+        Returns the degrees of separation from `source` to every person
+        as a uint8 array, with UNREACHABLE for people not connected.
+        Distances beyond 254 are recorded as 254.
+        """
+        return bfs_distances(self.person_offsets, self.person_movies,
+                             self.movie_offsets, self.movie_people, source)
+
+    def shortest_path(self, source, target, bidirectional=True, prune=None):
+        """
+        Returns the shortest list of (movie, person) integer pairs
+        that connect the source to the target, or None.
+
+        See bidirectional_path for `prune`.
+        """
+        self.num_explored = 0
+        if source == target:
+            return []
+        if not self.connected(source, target):
+            return None
+        if bidirectional:
+            return self.bidirectional_path(source, target, prune)
+        return self.level_path(source, target)
+
+    def level_path(self, source, target):
+        """
+        Breadth-first search from the source only, one level at a time
+        over the CSR arrays. It returns the path (and num_explored) of a
+        plain queue-based search that expands people in the order they
+        are reached, movies in sorted order and skips expanded movies.
+
+        Each level is two half-steps, people -> movies and movies ->
+        people. A half-step is done top-down, gathering the rows of the
+        new side, or bottom-up, scanning everything not yet reached for
+        a link back into the new side, whichever touches fewer entries.
+        Bottom-up pays off once the search reaches the big hubs, when
+        top-down mostly rediscovers people it has already seen.
+        """
+        parent_movie, parent_person = self.breadth_first(source, target)
+        if target != source and parent_person[target] < 0:
+            return None
+        solution = []
+        person = target
+        while person != source:
+            solution.append((int(parent_movie[person]), person))
+            person = int(parent_person[person])
+        solution.reverse()
+        return solution
+
+    def breadth_first(self, source, target=None):
+        """
+        The level-at-a-time search of level_path, from the source until
+        it reaches the target or, without one, everyone connected.
+        Returns the movie and the person one step back towards the
+        source of each person reached, as int32 arrays over all people
+        holding -1 for people not reached and for the source.
+        """
+        person_offsets, person_movies = self.person_offsets, self.person_movies
+        movie_offsets, movie_people = self.movie_offsets, self.movie_people
+        person_degrees = np.diff(person_offsets)
+        movie_sizes = np.diff(movie_offsets)
+
+        # Who has been reached and which movies expanded, as boolean maps
+        reached = np.zeros(self.num_people, dtype=bool)
+        reached[source] = True
+        seen_movies = np.zeros(self.num_movies, dtype=bool)
+        parent_movie = np.full(self.num_people, -1, dtype=np.int32)
+        parent_person = np.full(self.num_people, -1, dtype=np.int32)
+
+        # Links left on the unreached side, the cost of a bottom-up step
+        unreached_links = len(person_movies) - int(person_degrees[source])
+        unseen_links = len(movie_people)
+
+        frontier = np.array([source], dtype=np.int32)
+        while frontier.size:
+
+            # People -> movies: every unseen movie of the frontier, and the
+            # position in the frontier of the first person to reach it
+            if int(person_degrees[frontier].sum()) <= unseen_links + self.num_movies:
+                movies, owners = top_down(person_offsets, person_movies, frontier, seen_movies)
+            else:
+                movies, owners = bottom_up(movie_offsets, movie_people, movie_sizes,
+                                           seen_movies, frontier, self.num_people)
+            seen_movies[movies] = True
+            unseen_links -= int(movie_sizes[movies].sum())
+
+            # A queue-based search expands movies in this order; they come
+            # sorted, so a stable sort by owner keeps ties in movie order
+            order = np.argsort(owners, kind="stable")
+            movies = movies[order]
+            owners = owners[order]
+
+            # Movies -> people: everyone new, and the position in `movies`
+            # of the first movie to reach them
+            if int(movie_sizes[movies].sum()) <= unreached_links + self.num_people:
+                people, links = top_down(movie_offsets, movie_people, movies, reached)
+            else:
+                people, links = bottom_up(person_offsets, person_movies, person_degrees,
+                                          reached, movies, self.num_movies)
+
+            # and reaches people in this order
+            order = np.argsort(links, kind="stable")
+            people = people[order]
+            links = links[order]
+
+            reached[people] = True
+            unreached_links -= int(person_degrees[people].sum())
+            parent_movie[people] = movies[links]
+            parent_person[people] = frontier[owners[links]]
+
+            if target is not None and reached[target]:
+                link = links[people == target][0]
+                self.num_explored += int(owners[link]) + 1
+                return parent_movie, parent_person
+
+            self.num_explored += len(frontier)
+            frontier = people
+        return parent_movie, parent_person
+
+    def bidirectional_path(self, source, target, prune=None):
+        """
+        Breadth-first search from both ends, always expanding one full
+        level of whichever frontier is smaller.
+
+        If given, prune(people, depth, goal) is called with each new level
+        of either search and returns the people worth expanding. It must
+        keep everyone on a shortest path from source to target.
+        """
+        forward = {source: None}
+        backward = {target: None}
+        forward_frontier = [source]
+        backward_frontier = [target]
+        forward_movies = set()
+        backward_movies = set()
+        forward_depth = backward_depth = 0
+
+        while forward_frontier and backward_frontier:
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier, meeting = self.expand_level(
+                    forward_frontier, forward, forward_movies, backward)
+                forward_depth += 1
+                if prune is not None and meeting is None:
+                    forward_frontier = prune(forward_frontier, forward_depth, target)
+            else:
+                backward_frontier, meeting = self.expand_level(
+                    backward_frontier, backward, backward_movies, forward)
+                backward_depth += 1
+                if prune is not None and meeting is None:
+                    backward_frontier = prune(backward_frontier, backward_depth, source)
+
+            if meeting is not None:
+                solution = self.path_to(meeting, forward)
+                person = meeting
+                while backward[person] is not None:
+                    movie, person = backward[person]
+                    solution.append((movie, person))
+                return solution
+
+        return None
+
+    def expand_level(self, frontier, parents, seen_movies, other):
+        """
+        Expands every person in `frontier`. Returns the next frontier and
+        the first person reached that is already in `other`, if any.
+        """
+        next_frontier = []
+        for person in frontier:
+            self.num_explored += 1
+            for movie in self.movies_for_person(person).tolist():
+                if movie in seen_movies:
+                    continue
+                seen_movies.add(movie)
+                for neighbor in self.people_for_movie(movie).tolist():
+                    if neighbor in parents:
+                        continue
+                    parents[neighbor] = (movie, person)
+                    if neighbor in other:
+                        return next_frontier, neighbor
+                    next_frontier.append(neighbor)
+        return next_frontier, None
+
+    def search_tree(self, source):
+        """
+        Breadth-first search over everyone reachable from `source`.
+        Returns it as a SearchTree.
+        """
+        parent_movie, parent_person = self.breadth_first(source)
+        reached = parent_person >= 0
+        reached[source] = True
+        people = np.flatnonzero(reached).astype(np.int32)
+        parents = np.searchsorted(people, parent_person[people]).astype(np.int32)
+        parents[parent_person[people] < 0] = -1
+        return SearchTree(people, parent_movie[people], parents)
+
+    def path_to(self, person, parents):
+        """
+        Follows `parents` back from `person` to the root of the search.
+        """
+        solution = []
+        while parents[person] is not None:
+            movie, parent = parents[person]
+            solution.append((movie, person))
+            person = parent
+        solution.reverse()
+        return solution
+
+
+class SearchTree():
+    """
+    Breadth-first search tree from Graph.search_tree, in three int32
+    arrays as long as the component: the people reached in sorted
+    order, and for each the movie and the position in `people` of the
+    person one step back towards the source (-1 for the source).
+    """
+    def __init__(self, people, movies, parents):
+        self.people = people
+        self.movies = movies
+        self.parents = parents
+
+    def __len__(self):
+        return len(self.people)
+
+    def __contains__(self, person):
+        return self.position(person) is not None
+
+    def position(self, person):
+        i = int(np.searchsorted(self.people, person))
+        if i < len(self.people) and self.people[i] == person:
+            return i
+        return None
+
+    def path_to(self, person):
+        """
+        Returns the (movie, person) integer pairs from the source to
+        `person`, or None if the search did not reach them.
+        """
+        i = self.position(person)
+        if i is None:
+            return None
+        solution = []
+        while self.parents[i] >= 0:
+            solution.append((int(self.movies[i]), int(self.people[i])))
+            i = int(self.parents[i])
+        solution.reverse()
+        return solution
+
+
+class PeopleView(Mapping):
+    """
+    Read-only view of a Graph shaped like degrees.people.
+    """
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        graph = self.graph
+        person = graph.person_index[person_id]
+        return {
+            "name": graph.person_names[person],
+            "birth": graph.person_births[person],
+            "movies": {graph.movie_ids[movie] for movie in graph.movies_for_person(person).tolist()}
+        }
+
+    def __contains__(self, person_id):
+        return person_id in self.graph.person_index
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return self.graph.num_people
+
+
+class MoviesView(Mapping):
+    """
+    Read-only view of a Graph shaped like degrees.movies.
+    """
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        graph = self.graph
+        movie = graph.movie_index[movie_id]
+        return {
+            "title": graph.movie_titles[movie],
+            "year": graph.movie_years[movie],
+            "stars": {graph.person_ids[person] for person in graph.people_for_movie(movie).tolist()}
+        }
+
+    def __contains__(self, movie_id):
+        return movie_id in self.graph.movie_index
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return self.graph.num_movies
+
+
+def build_csr(rows, columns, num_rows, num_columns):
+    """
+    Builds CSR offsets and indices from parallel arrays of (row, column)
+    pairs, dropping duplicate pairs. Columns are sorted within each row.
+    """
+    keys = np.unique(rows.astype(np.int64) * num_columns + columns)
+    indices = (keys % num_columns).astype(np.int32)
+    counts = np.bincount(keys // num_columns, minlength=num_rows)
+    offsets = np.zeros(num_rows + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return offsets, indices
+
+
+def bfs_distances(person_offsets, person_movies, movie_offsets, movie_people, source):
+    """
+    Level-synchronous breadth-first search over raw CSR arrays.
+    See Graph.distances.
+    """
+    distances = np.full(len(person_offsets) - 1, UNREACHABLE, dtype=np.uint8)
+    distances[source] = 0
+    seen_movies = np.zeros(len(movie_offsets) - 1, dtype=bool)
+    frontier = np.array([source])
+    level = 0
+    while frontier.size:
+        level = min(level + 1, UNREACHABLE - 1)
+        movies = np.unique(gather(person_offsets, person_movies, frontier))
+        movies = movies[~seen_movies[movies]]
+        seen_movies[movies] = True
+        people = np.unique(gather(movie_offsets, movie_people, movies))
+        frontier = people[distances[people] == UNREACHABLE]
+        distances[frontier] = level
+    return distances
+
+
+def top_down(offsets, indices, rows, done):
+    """
+    Returns the entries of CSR rows `rows` not marked in `done`, without
+    repeats, with the position in `rows` of the first row holding each.
+    """
+    entries = gather(offsets, indices, rows)
+    owners = np.repeat(np.arange(len(rows)), offsets[rows + 1] - offsets[rows])
+    keep = ~done[entries]
+    first = np.full(len(done), len(rows), dtype=np.int64)
+    np.minimum.at(first, entries[keep], owners[keep])
+    entries = np.flatnonzero(first < len(rows)).astype(np.int32)
+    return entries, first[entries]
+
+
+def bottom_up(offsets, indices, lengths, done, rows, num_rows):
+    """
+    Same result as top_down, given the transposed CSR arrays: scans
+    every entry not marked in `done` for links to `rows`, instead of
+    gathering the rows themselves. `lengths` are the transposed row
+    lengths and `num_rows` the number of rows `rows` are drawn from.
+    """
+    candidates = np.flatnonzero(~done & (lengths > 0))
+    if candidates.size == 0:
+        return candidates.astype(np.int32), candidates
+
+    # Position of each row in `rows`, or len(rows) if it is not one of them
+    position = np.full(num_rows, len(rows), dtype=np.int64)
+    position[rows] = np.arange(len(rows))
+    links = position[gather(offsets, indices, candidates)]
+    starts = np.cumsum(lengths[candidates]) - lengths[candidates]
+    first = np.minimum.reduceat(links, starts)
+    linked = first < len(rows)
+    return candidates[linked].astype(np.int32), first[linked]
+
+
+def gather(offsets, indices, rows):
+    """
+    Returns the concatenated CSR rows `rows` as one array.
+    """
+    starts = offsets[rows]
+    lengths = offsets[rows + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return indices[:0]
+
+    # Position of each output element: its row start plus its offset in the row
+    row_ends = np.cumsum(lengths)
+    positions = np.arange(total) - np.repeat(row_ends - lengths - starts, lengths)
+    return indices[positions]
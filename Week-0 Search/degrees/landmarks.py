@@ -0,0 +1,183 @@
+"""
+Landmark distance index (ALT) for graph.Graph.
+
+A handful of well-connected people are chosen as landmarks and their
+degrees of separation to everyone are stored in a uint8 array with one
+row per person. By the triangle inequality, for any landmark L
+
+    |d(L, a) - d(L, b)| <= d(a, b) <= d(L, a) + d(L, b)
+
+which gives separation bounds without searching, and lets a search
+skip everyone who cannot be on a shortest path.
+
+The index is saved in the dataset's snapshot directory (see snapshot.py)
+as landmarks.npy (the distances, memory-mapped on load) and
+landmarks.json (the landmarks and the CSV fingerprint it was built from).
+It checks that fingerprint itself, so rebuilding the snapshot keeps it.
+"""
+
+import json
+import math
+import os
+
+import numpy as np
+
+import snapshot
+from graph import UNREACHABLE
+
+LANDMARKS = 16
+
+
+class LandmarkIndex():
+    def __init__(self, landmarks, distances):
+        self.landmarks = landmarks
+
+        # distances[person, i] is the separation of person from landmarks[i]
+        self.distances = distances
+
+        # Number of people expanded by the most recent search
+        self.num_explored = 0
+
+    @classmethod
+    def build(cls, graph, k=LANDMARKS):
+        """
+        Picks the k people with the most movies as landmarks
+        and records their distances to everyone.
+        """
+        movie_counts = np.diff(graph.person_offsets)
+        k = min(k, graph.num_people)
+        landmarks = np.argsort(-movie_counts, kind="stable")[:k]
+        distances = np.empty((graph.num_people, k), dtype=np.uint8)
+        for i, landmark in enumerate(landmarks):
+            distances[:, i] = graph.distances(landmark)
+        return cls(landmarks.tolist(), distances)
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the separation of source and
+        target. Both are math.inf if they are known not to be connected.
+        """
+        a = self.distances[source].astype(np.int16)
+        b = self.distances[target].astype(np.int16)
+        reached_a = a != UNREACHABLE
+        reached_b = b != UNREACHABLE
+
+        # A landmark connected to exactly one of them separates them
+        if np.any(reached_a != reached_b):
+            return math.inf, math.inf
+        both = reached_a & reached_b
+        if not both.any():
+            return 0, math.inf
+        lower = int(np.abs(a[both] - b[both]).max())
+        upper = int((a[both] + b[both]).min())
+        return lower, upper
+
+    def heuristic(self, people, target):
+        """
+        Returns a lower bound on the separation of each of `people`
+        from the target, using only landmarks connected to the target.
+        """
+        b = self.distances[target].astype(np.int16)
+        useful = b != UNREACHABLE
+        if not useful.any():
+            return np.zeros(len(people), dtype=np.int16)
+        a = self.distances[people][:, useful].astype(np.int16)
+        return np.abs(a - b[useful]).max(axis=1)
+
+    def shortest_path(self, graph, source, target):
+        """
+        Bidirectional breadth-first search that does not expand anyone
+        the landmark bounds rule out: a person reached at depth d whose
+        lower bound to the far end exceeds the upper bound on the
+        separation minus d. Returns a list of (movie, person) integer
+        pairs, or None.
+        """
+        upper = self.bounds(source, target)[1]
+
+        def prune(people, depth, goal):
+            if not people or upper == math.inf:
+                return people
+            people = np.array(people)
+            return people[depth + self.heuristic(people, goal) <= upper].tolist()
+
+        path = graph.shortest_path(source, target, prune=prune)
+        self.num_explored = graph.num_explored
+        return path
+
+    def update(self, graph, casts):
+        """
+        Brings the index up to date after graph.extend added `casts`
+        (lists of people). Distances only change for a landmark if a new
+        co-star pair is more than one degree apart from it, so only those
+        landmarks are recomputed. Returns the number recomputed.
+        """
+        distances = np.asarray(self.distances)
+        added = graph.num_people - len(distances)
+        if added:
+            distances = np.concatenate([
+                distances,
+                np.full((added, len(self.landmarks)), UNREACHABLE, dtype=np.uint8)
+            ])
+
+        stale = np.zeros(len(self.landmarks), dtype=bool)
+        for cast in casts:
+            reached = distances[cast].astype(np.int16)
+            stale |= reached.max(axis=0) - reached.min(axis=0) > 1
+
+        if stale.any():
+            distances = np.array(distances)
+            for i in np.flatnonzero(stale):
+                distances[:, i] = graph.distances(self.landmarks[i])
+        self.distances = distances
+        return int(stale.sum())
+
+    def save(self, directory):
+        path = os.path.join(directory, snapshot.SNAPSHOT_DIR)
+        os.makedirs(path, exist_ok=True)
+
+        # Written to new files and renamed over the old ones, which this
+        # index's distances may still be memory-mapped from
+        filename = os.path.join(path, "landmarks.npy")
+        with open(filename + ".tmp", "wb") as f:
+            np.save(f, self.distances)
+        os.replace(filename + ".tmp", filename)
+        filename = os.path.join(path, "landmarks.json")
+        with open(filename + ".tmp", "w") as f:
+            json.dump({
+                "landmarks": self.landmarks,
+                "fingerprint": snapshot.fingerprint(directory)
+            }, f)
+        os.replace(filename + ".tmp", filename)
+
+
+def load(directory):
+    """
+    Returns the LandmarkIndex saved in `directory`,
+    or None if there is none or it is out of date.
+    """
+    path = os.path.join(directory, snapshot.SNAPSHOT_DIR)
+    try:
+        with open(os.path.join(path, "landmarks.json")) as f:
+            metadata = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if metadata["fingerprint"] != snapshot.fingerprint(directory):
+        return None
+    distances = np.load(os.path.join(path, "landmarks.npy"), mmap_mode="r")
+    return LandmarkIndex(metadata["landmarks"], distances)
+
+
+def load_or_build(directory, graph, k=LANDMARKS):
+    """
+    Returns the saved index for `directory` if it is up to date
+    and has k landmarks, and otherwise builds and saves a new one.
+    """
+    index = load(directory)
+    if index is not None and len(index.landmarks) == min(k, graph.num_people):
+        return index
+    index = LandmarkIndex.build(graph, k)
+    try:
+        index.save(directory)
+    except OSError:
+        pass
+    return index
@@ -0,0 +1,247 @@
+"""
+Prefix and fuzzy lookup of people by name.
+
+Names are kept lowercased in sorted order for prefix lookups by binary
+search, and in a character-trigram inverted index for fuzzy lookups,
+held in NumPy arrays like the graph: the distinct trigrams (as integer
+codes) in sorted order, and for each one the positions of the names
+containing it, CSR style. The arrays are built at load time and stored
+in the csr backend's snapshot.
+
+Each edit to a name changes at most three of its trigrams, so a name
+within `d` edits of the query still has all but 3d of the query's
+distinct trigrams. Fuzzy lookups count, with array operations, how
+many of the query's trigrams each name has, and only compute the edit
+distance of names of about the right length with enough of them.
+
+Names added after the index is built (see degrees.apply_delta) go into
+a second, small NameIndex over just those names, whose matches are
+merged into every lookup, so adding people never rebuilds the whole
+index. compacted() folds them in when the snapshot is written.
+"""
+
+import bisect
+
+import numpy as np
+
+MAX_RESULTS = 10
+MAX_DISTANCE = 2
+
+# Arrays of the index, as stored in a snapshot
+ARRAYS = ["lengths", "codes", "offsets", "postings"]
+
+# Names turned into trigrams at a time while building the index
+CHUNK = 65536
+
+
+class NameIndex():
+    def __init__(self, names, movie_count, keys, lengths, codes, offsets, postings):
+        """
+        `names` maps lowercased names to sets of person_ids, as in
+        degrees.names, and `movie_count` returns a person's number of
+        movies, used to rank matches. `keys` are the names in sorted
+        order and `lengths` their lengths; the names with the trigram
+        codes[i] are at positions postings[offsets[i]:offsets[i + 1]]
+        of `keys`.
+        """
+        self.names = names
+        self.movie_count = movie_count
+        self.keys = keys
+        self.lengths = lengths
+        self.codes = codes
+        self.offsets = offsets
+        self.postings = postings
+
+        # NameIndex of the names added since this one was built, or None
+        self.added = None
+
+    @classmethod
+    def build(cls, names, movie_count, keys=None):
+        """
+        Indexes the sorted `keys` of `names`, by default all of them.
+        """
+        if keys is None:
+            keys = sorted(names)
+        lengths = np.fromiter(map(len, keys), dtype=np.int32, count=len(keys))
+
+        # Trigram codes of every name and the position of the name, done
+        # in chunks of names of similar length so the padding stays small
+        order = np.argsort(lengths, kind="stable")
+        chunk_codes = [np.zeros(0, dtype=np.int64)]
+        chunk_positions = [np.zeros(0, dtype=np.int32)]
+        for start in range(0, len(keys), CHUNK):
+            positions = order[start:start + CHUNK]
+            codes = trigram_codes([keys[position] for position in positions.tolist()])
+
+            # Each trigram only once per name
+            codes.sort(axis=1)
+            valid = codes >= 0
+            valid[:, 1:] &= codes[:, 1:] != codes[:, :-1]
+            chunk_codes.append(codes[valid])
+            chunk_positions.append(np.broadcast_to(positions[:, None], codes.shape)[valid])
+        codes = np.concatenate(chunk_codes)
+        positions = np.concatenate(chunk_positions).astype(np.int32)
+
+        order = np.argsort(codes)
+        codes = codes[order]
+        postings = positions[order]
+        starts = np.flatnonzero(np.diff(codes, prepend=-1) != 0)
+        offsets = np.append(starts, len(codes)).astype(np.int64)
+        return cls(names, movie_count, keys, lengths, codes[starts], offsets, postings)
+
+    def add(self, keys):
+        """
+        Indexes names added to `names` since the index was built, in the
+        small index of added names.
+        """
+        keys = {key for key in keys if not self.indexed(key)}
+        if self.added is not None:
+            keys.update(self.added.keys)
+        if keys:
+            self.added = NameIndex.build(self.names, self.movie_count, sorted(keys))
+
+    def indexed(self, key):
+        """
+        Returns True if `key` is one of the names in the main index.
+        """
+        i = bisect.bisect_left(self.keys, key)
+        return i < len(self.keys) and self.keys[i] == key
+
+    def compacted(self):
+        """
+        Returns an index of every name with no separate added names:
+        this one if there are none, or a new one built from `names`.
+        """
+        if self.added is None:
+            return self
+        return NameIndex.build(self.names, self.movie_count)
+
+    def prefix(self, prefix, limit=MAX_RESULTS):
+        """
+        Returns up to `limit` person_ids whose names start with
+        `prefix`, most movies first.
+        """
+        prefix = prefix.lower()
+        matches = self.prefix_matches(prefix)
+        if self.added is not None:
+            matches += self.added.prefix_matches(prefix)
+        return self.rank(matches, limit)
+
+    def fuzzy(self, name, max_distance=MAX_DISTANCE, limit=MAX_RESULTS):
+        """
+        Returns up to `limit` person_ids whose names are within
+        `max_distance` edits of `name`, most movies first.
+        """
+        name = name.lower()
+        matches = self.fuzzy_matches(name, max_distance)
+        if self.added is not None:
+            matches += self.added.fuzzy_matches(name, max_distance)
+        return self.rank(matches, limit)
+
+    def prefix_matches(self, prefix):
+        """
+        Returns (0, name) for the names of this index that start with
+        the lowercased `prefix`.
+        """
+        start = bisect.bisect_left(self.keys, prefix)
+        end = bisect.bisect_left(self.keys, prefix + "\uffff")
+        return [(0, key) for key in self.keys[start:end]]
+
+    def fuzzy_matches(self, name, max_distance):
+        """
+        Returns (distance, name) for the names of this index within
+        `max_distance` edits of the lowercased `name`.
+        """
+        candidates = np.abs(self.lengths - len(name)) <= max_distance
+
+        # Names within max_distance edits share this many of the query's trigrams
+        query = np.unique(trigram_codes([name]))
+        query = query[query >= 0]
+        needed = len(query) - 3 * max_distance
+        if needed > 0:
+            counts = np.zeros(len(self.lengths), dtype=np.int32)
+            found = np.searchsorted(self.codes, query)
+            present = found < len(self.codes)
+            present[present] = self.codes[found[present]] == query[present]
+            for i in found[present].tolist():
+                counts[self.postings[self.offsets[i]:self.offsets[i + 1]]] += 1
+            candidates &= counts >= needed
+
+        matches = []
+        for position in np.flatnonzero(candidates).tolist():
+            key = self.keys[position]
+            distance = edit_distance(name, key, max_distance)
+            if distance <= max_distance:
+                matches.append((distance, key))
+        return matches
+
+    def rank(self, matches, limit):
+        """
+        Expands (distance, name) matches into person_ids, ordered by
+        movie count and then by distance.
+        """
+        ranked = []
+        for distance, key in matches:
+            for person_id in self.names[key]:
+                ranked.append((-self.movie_count(person_id), distance, key, person_id))
+        ranked.sort()
+        return [person_id for _, _, _, person_id in ranked[:limit]]
+
+
+def trigram_codes(names):
+    """
+    Returns an array with a row of trigram codes for each name, padded
+    with -1. Names are padded with two spaces at the start and one at
+    the end, so short names and name starts are represented, and the
+    three characters of a trigram are packed 21 bits each into a code.
+    """
+    padded = np.array([f"  {name} " for name in names])
+    width = padded.dtype.itemsize // 4
+    chars = padded.view(np.uint32).reshape(len(names), width).astype(np.int64)
+    codes = chars[:, :-2] << 42 | chars[:, 1:-1] << 21 | chars[:, 2:]
+    codes[np.arange(width - 2) >= np.char.str_len(padded)[:, None] - 2] = -1
+    return codes
+
+
+def edit_distance(a, b, bound):
+    """
+    Returns the Levenshtein distance between a and b,
+    or bound + 1 once it is known to exceed `bound`.
+
+    Uses Myers' bit-parallel algorithm: a column of the dynamic
+    programming table is kept as bit masks of where consecutive cells
+    go up or down by one, so each character of b costs a handful of
+    integer operations instead of a pass over a.
+    """
+    if not a:
+        return len(b) if len(b) <= bound else bound + 1
+
+    # Bit-parallel: bit i of each word is a difference between rows i and
+    # i + 1 (vertical) or between columns (horizontal) of the DP table
+    positions = {}
+    for i, char in enumerate(a):
+        positions[char] = positions.get(char, 0) | 1 << i
+    mask = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    plus = mask
+    minus = 0
+    distance = len(a)
+    remaining = len(b)
+    for char in b:
+        equal = positions.get(char, 0)
+        vertical = equal | minus
+        horizontal = (((equal & plus) + plus) ^ plus) | equal
+        horizontal_plus = minus | (~(horizontal | plus) & mask)
+        horizontal_minus = plus & horizontal
+        if horizontal_plus & last:
+            distance += 1
+        elif horizontal_minus & last:
+            distance -= 1
+        remaining -= 1
+        if distance - remaining > bound:
+            return bound + 1
+        horizontal_plus = (horizontal_plus << 1 | 1) & mask
+        horizontal_minus = (horizontal_minus << 1) & mask
+        plus = horizontal_minus | (~(vertical | horizontal_plus) & mask)
+        minus = horizontal_plus & vertical
+    return distance if distance <= bound else bound + 1
@@ -0,0 +1,143 @@
+"""
+Enumerating many paths between two people.
+
+Both generators take a `neighbors(person)` function returning
+(movie, person) pairs, so they work on either backend, and yield paths
+as lists of (movie, person) pairs like shortest_path.
+"""
+
+import heapq
+import itertools
+
+
+def all_shortest_paths(neighbors, source, target):
+    """
+    Yields every distinct shortest path from source to target.
+
+    A breadth-first search records, for each person, every (movie, person)
+    step that reaches them from the previous level. The paths are then
+    walked back from the target through that parent graph one at a time,
+    so memory stays proportional to the graph searched, however many
+    paths there are.
+    """
+    if source == target:
+        yield []
+        return
+
+    depths = {source: 0}
+    parents = {}
+    frontier = [source]
+    depth = 0
+    while frontier and target not in depths:
+        depth += 1
+        next_frontier = []
+        for person in frontier:
+            for movie, other in neighbors(person):
+                other_depth = depths.get(other)
+                if other_depth is None:
+                    depths[other] = depth
+                    parents[other] = [(movie, person)]
+                    next_frontier.append(other)
+                elif other_depth == depth:
+                    parents[other].append((movie, person))
+        frontier = next_frontier
+    if target not in depths:
+        return
+
+    # Depth-first walk from the target; steps are collected backwards
+    steps = []
+    stack = [iter(parents[target])]
+    people = [target]
+    while stack:
+        step = next(stack[-1], None)
+        if step is None:
+            stack.pop()
+            people.pop()
+            if steps:
+                steps.pop()
+            continue
+        movie, parent = step
+        steps.append((movie, people[-1]))
+        if parent == source:
+            yield steps[::-1]
+            steps.pop()
+        else:
+            stack.append(iter(parents[parent]))
+            people.append(parent)
+
+
+def k_shortest_paths(neighbors, source, target, k=None):
+    """
+    Yields up to k simple paths (no person visited twice) from source to
+    target in order of increasing length, using Yen's algorithm. Paths
+    of the same length come out in no particular order. With k=None,
+    yields every simple path.
+    """
+    path = constrained_path(neighbors, source, target, set(), set())
+    if path is None:
+        return
+    found = 1
+    yield path
+
+    # Maps each root path (as a tuple) to the steps found paths took after it
+    branches = {}
+
+    # Candidate paths, shortest first, and every path seen so far
+    candidates = []
+    seen = {tuple(path)}
+    counter = itertools.count()
+    while k is None or found < k:
+        for i in range(len(path)):
+            branches.setdefault(tuple(path[:i]), set()).add(path[i])
+
+        # Branch off each person on the last path in turn, avoiding the
+        # steps earlier paths took from there and the people before it
+        people = [source] + [person for _, person in path]
+        for i in range(len(path)):
+            root = path[:i]
+            spur = constrained_path(neighbors, people[i], target,
+                                    set(people[:i]), branches[tuple(root)])
+            if spur is None:
+                continue
+            candidate = root + spur
+            if tuple(candidate) not in seen:
+                seen.add(tuple(candidate))
+                heapq.heappush(candidates, (len(candidate), next(counter), candidate))
+
+        if not candidates:
+            return
+        _, _, path = heapq.heappop(candidates)
+        found += 1
+        yield path
+
+
+def constrained_path(neighbors, source, target, blocked_people, blocked_steps):
+    """
+    Breadth-first search for a shortest path that avoids `blocked_people`
+    and does not take any of `blocked_steps` out of the source.
+    """
+    if source == target:
+        return []
+    parents = {source: None}
+    frontier = [source]
+    while frontier:
+        next_frontier = []
+        for person in frontier:
+            for step in neighbors(person):
+                movie, other = step
+                if other in parents or other in blocked_people:
+                    continue
+                if person == source and step in blocked_steps:
+                    continue
+                parents[other] = (movie, person)
+                if other == target:
+                    solution = []
+                    while parents[other] is not None:
+                        movie, parent = parents[other]
+                        solution.append((movie, other))
+                        other = parent
+                    solution.reverse()
+                    return solution
+                next_frontier.append(other)
+        frontier = next_frontier
+    return None
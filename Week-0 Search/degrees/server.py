@@ -0,0 +1,379 @@
+"""
+Long-lived query server for degrees.py.
+
+Loads the data once and answers many (source, target) requests, one JSON
+object per line, from stdin or from clients on a UNIX socket:
+
+    {"id": 1, "source": "102", "target": "158"}
+
+Each request is answered with a JSON line echoing `id`, with `degrees` and
+`path` (a list of [movie_id, person_id] pairs, or null if not connected),
+or with `error`. Answers come back in completion order, not request order.
+
+    {"update": "path/to/delta"}
+
+adds the people.csv, movies.csv and stars.csv rows in a delta directory
+to the loaded data (see degrees.apply_delta). Only cached answers for
+components that gained connections are dropped.
+
+Computed paths are kept in an LRU cache. A source whose connected
+component is small gets a full breadth-first search tree, also cached,
+so later queries from (or to) it are answered without searching; a
+source in a bigger component gets one only once it is asked about again,
+built by a background thread while the query itself is searched. The
+tree cache is bounded by the total number of people in its trees.
+People in different components are answered without searching at all.
+
+Cached answers are served without locking. Searches share the data
+with each other, and only updates wait for them to finish.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import degrees
+
+PATH_CACHE_SIZE = 100_000
+
+# People in all cached search trees together; a csr tree takes 12 bytes
+# per person
+TREE_CACHE_PEOPLE = 10_000_000
+
+# Sources in components this small always get a search tree
+SMALL_COMPONENT = 1000
+
+
+class LRUCache():
+    """
+    Least recently used cache holding up to `capacity` entries or, given
+    a `weight` function, entries whose weights add up to `capacity`.
+    """
+    def __init__(self, capacity, weight=None):
+        self.capacity = capacity
+        self.weight = weight
+        self.entries = OrderedDict()
+        self.total = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key, value):
+        with self.lock:
+            self.remove(key)
+            self.entries[key] = value
+            self.total += self.size(value)
+            while self.total > self.capacity:
+                self.remove(next(iter(self.entries)))
+
+    def size(self, value):
+        return 1 if self.weight is None else self.weight(value)
+
+    def remove(self, key):
+        if key in self.entries:
+            self.total -= self.size(self.entries.pop(key))
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def discard_where(self, predicate):
+        """
+        Removes every entry whose key satisfies `predicate`.
+        Returns the number removed.
+        """
+        with self.lock:
+            keys = [key for key in self.entries if predicate(key)]
+            for key in keys:
+                self.remove(key)
+            return len(keys)
+
+
+class ReadWriteLock():
+    """
+    Lets in any number of readers at once, or one writer alone. A
+    waiting writer keeps new readers out, so writers are not starved.
+    """
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.readers = 0
+        self.writer = False
+        self.writers_waiting = 0
+
+    @contextmanager
+    def reading(self):
+        with self.condition:
+            while self.writer or self.writers_waiting:
+                self.condition.wait()
+            self.readers += 1
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.readers -= 1
+                if not self.readers:
+                    self.condition.notify_all()
+
+    @contextmanager
+    def writing(self):
+        with self.condition:
+            self.writers_waiting += 1
+            while self.writer or self.readers:
+                self.condition.wait()
+            self.writers_waiting -= 1
+            self.writer = True
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.writer = False
+                self.condition.notify_all()
+
+
+class QueryEngine():
+    """
+    Answers path queries against the data loaded into degrees.py.
+    """
+    def __init__(self, path_cache_size=PATH_CACHE_SIZE, tree_cache_people=TREE_CACHE_PEOPLE):
+        self.paths = LRUCache(path_cache_size)
+        self.trees = LRUCache(tree_cache_people, weight=len)
+
+        # Sources seen recently, to decide when a search tree pays off
+        self.sources = LRUCache(path_cache_size)
+
+        # Searches read the data and updates replace it
+        self.lock = ReadWriteLock()
+
+        # Search trees of sources in big components are built here, one
+        # at a time, off the request path
+        self.builder = ThreadPoolExecutor(max_workers=1)
+        self.building = set()
+        self.building_lock = threading.Lock()
+
+    def path(self, source, target):
+        """
+        Returns the shortest path from source to target, using and
+        filling the caches.
+        """
+        path = self.cached_path(source, target)
+        if path is not False:
+            return path
+
+        with self.lock.reading():
+            if not degrees.connected(source, target):
+                return None
+            size = degrees.component_size(source)
+            if size <= SMALL_COMPONENT:
+                tree = degrees.search_tree(source)
+                self.trees.put(source, tree)
+                path = degrees.path_in_tree(tree, target)
+            else:
+                if source in self.sources and size <= self.trees.capacity:
+                    self.build_tree(source)
+                self.sources.put(source, True)
+                path = degrees.shortest_path(source, target)
+            self.paths.put((source, target), path)
+            return path
+
+    def build_tree(self, source):
+        """
+        Queues a search tree from `source` to be built in the background,
+        unless it is already cached or queued.
+        """
+        with self.building_lock:
+            if source in self.building or source in self.trees:
+                return
+            self.building.add(source)
+        self.builder.submit(self.search_tree, source)
+
+    def search_tree(self, source):
+        try:
+            with self.lock.reading():
+                self.trees.put(source, degrees.search_tree(source))
+        finally:
+            with self.building_lock:
+                self.building.discard(source)
+
+    def update(self, directory):
+        """
+        Applies the delta CSV files in `directory` to the loaded data and
+        drops cached paths and trees only for components that changed.
+        """
+        with self.lock.writing():
+            affected = degrees.apply_delta(*degrees.read_delta(directory))
+            return {
+                "components_changed": len(affected),
+                "paths_dropped": self.paths.discard_where(
+                    lambda key: degrees.component_id(key[0]) in affected),
+                "trees_dropped": self.trees.discard_where(
+                    lambda source: degrees.component_id(source) in affected),
+            }
+
+    def close(self):
+        self.builder.shutdown(wait=False, cancel_futures=True)
+
+    def cached_path(self, source, target):
+        """
+        Returns the path from the caches, or False if it is not cached.
+        """
+        path = self.paths.get((source, target), False)
+        if path is not False:
+            return path
+        path = self.paths.get((target, source), False)
+        if path is not False:
+            return reverse_path(target, path)
+
+        tree = self.trees.get(source)
+        if tree is not None:
+            return degrees.path_in_tree(tree, target)
+        tree = self.trees.get(target)
+        if tree is not None:
+            return reverse_path(target, degrees.path_in_tree(tree, source))
+        return False
+
+    def stats(self):
+        return {
+            "path_hits": self.paths.hits,
+            "path_misses": self.paths.misses,
+            "paths_cached": len(self.paths.entries),
+            "trees_cached": len(self.trees.entries),
+            "tree_people": self.trees.total,
+        }
+
+
+def reverse_path(source, path):
+    """
+    Turns a path from `source` into the same path walked backwards.
+    """
+    if path is None:
+        return None
+    people = [source] + [person_id for _, person_id in path]
+    return [(path[i][0], people[i]) for i in reversed(range(len(path)))]
+
+
+class Server():
+    def __init__(self, engine, workers=None):
+        self.engine = engine
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+
+        # Searches in progress, so concurrent identical requests share one
+        self.pending = {}
+
+    async def answer(self, line):
+        """
+        Returns the JSON response for one request line.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            request = json.loads(line)
+            if "update" in request:
+                response = await loop.run_in_executor(
+                    self.executor, self.engine.update, request["update"])
+                response["id"] = request.get("id")
+                return json.dumps(response)
+            source = str(request["source"])
+            target = str(request["target"])
+        except (ValueError, KeyError, TypeError, OSError) as e:
+            return json.dumps({"error": f"bad request: {e}"})
+
+        response = {"id": request.get("id"), "source": source, "target": target}
+        if source not in degrees.people or target not in degrees.people:
+            response["error"] = "person not found"
+            return json.dumps(response)
+
+        key = (source, target)
+        if key not in self.pending:
+            self.pending[key] = loop.run_in_executor(self.executor, self.engine.path, source, target)
+        try:
+            path = await self.pending[key]
+        finally:
+            self.pending.pop(key, None)
+
+        response["degrees"] = len(path) if path is not None else None
+        response["path"] = path
+        return json.dumps(response)
+
+    async def serve_stream(self, reader, write):
+        """
+        Answers every line from `reader` concurrently, passing each
+        response line to `write`.
+        """
+        tasks = set()
+
+        async def respond(line):
+            write(await self.answer(line) + "\n")
+
+        while line := await reader.readline():
+            if not line.strip():
+                continue
+            task = asyncio.create_task(respond(line))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def serve_stdin(self):
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+        def write(line):
+            sys.stdout.write(line)
+            sys.stdout.flush()
+
+        await self.serve_stream(reader, write)
+
+    async def serve_socket(self, path):
+        async def client(reader, writer):
+            await self.serve_stream(reader, lambda line: writer.write(line.encode()))
+            await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_unix_server(client, path=path)
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--socket", help="listen on this UNIX socket instead of stdin")
+    parser.add_argument("--backend", choices=["dict", "csr"], default="csr",
+                        help="in-memory representation of the data")
+    parser.add_argument("--cache-size", type=int, default=PATH_CACHE_SIZE,
+                        help="number of paths to keep cached")
+    parser.add_argument("--tree-cache-people", type=int, default=TREE_CACHE_PEOPLE,
+                        help="number of people to keep in cached search trees, in all")
+    args = parser.parse_args()
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory, backend=args.backend)
+    print("Data loaded.", file=sys.stderr)
+
+    server = Server(QueryEngine(args.cache_size, args.tree_cache_people))
+    try:
+        if args.socket:
+            asyncio.run(server.serve_socket(args.socket))
+        else:
+            asyncio.run(server.serve_stdin())
+    except KeyboardInterrupt:
+        pass
+    server.engine.close()
+    print(json.dumps(server.engine.stats()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Binary snapshot cache for graph.Graph.
+
+A snapshot lives in a `.snapshot` directory next to the CSV files, as
+.npy files that are all memory-mapped on load, so loading reads little
+more than their headers. Besides the adjacency arrays it holds the
+string tables (ids, names, titles, births and years) as byte arrays with
+offsets, the orders that map ids back to people and movies, and
+degrees.names, all in the forms of tables.py, and the arrays of the
+name_index.NameIndex over them. Strings are decoded only when they
+are looked up. `manifest.json` records the mtime and size of each CSV
+file; it is written last, so a snapshot without a matching manifest is
+never used. The landmark index (landmarks.py) keeps its files in the
+same directory, and they are carried over when the snapshot is rebuilt.
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+
+import name_index
+from graph import Graph
+from tables import NameTable, StringIndex, StringTable
+
+SNAPSHOT_DIR = ".snapshot"
+VERSION = 4
+
+CSV_FILES = ["people.csv", "movies.csv", "stars.csv"]
+ARRAYS = ["person_offsets", "person_movies", "movie_offsets", "movie_people",
+          "components", "component_sizes"]
+TABLES = ["person_ids", "person_names", "person_births",
+          "movie_ids", "movie_titles", "movie_years"]
+
+# Files of other indexes in the snapshot directory, which check their own
+# fingerprints and are kept when the snapshot is rebuilt
+KEPT_FILES = ["landmarks.npy", "landmarks.json"]
+
+
+def fingerprint(directory):
+    """
+    Returns the mtime and size of each CSV file in `directory`.
+    """
+    files = {}
+    for filename in CSV_FILES:
+        stat = os.stat(os.path.join(directory, filename))
+        files[filename] = [stat.st_mtime_ns, stat.st_size]
+    return {"version": VERSION, "files": files}
+
+
+def load(directory):
+    """
+    Returns (graph, names, arrays) from the snapshot in `directory`, where
+    `arrays` are those of a NameIndex over `names`, in the order of
+    name_index.ARRAYS. Returns None if there is no snapshot or it is out
+    of date.
+    """
+    path = os.path.join(directory, SNAPSHOT_DIR)
+    try:
+        with open(os.path.join(path, "manifest.json")) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest != fingerprint(directory):
+        return None
+
+    # Plain ndarray views of the maps skip np.memmap's per-lookup overhead
+    def array(name):
+        return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r").view(np.ndarray)
+
+    tables = {name: StringTable(array(f"{name}.offsets"), array(f"{name}.data"))
+              for name in TABLES}
+    graph = Graph(
+        *(tables[name] for name in TABLES), *(array(name) for name in ARRAYS),
+        person_index=StringIndex(tables["person_ids"], array("person_order")),
+        movie_index=StringIndex(tables["movie_ids"], array("movie_order"))
+    )
+    names = NameTable(
+        StringTable(array("name_keys.offsets"), array("name_keys.data")),
+        array("name_offsets"), array("name_people"), tables["person_ids"]
+    )
+    arrays = [array(f"name_index_{name}") for name in name_index.ARRAYS]
+    return graph, names, arrays
+
+
+def save(directory, graph, names, index):
+    """
+    Writes a snapshot of `graph`, the `names` mapping and the NameIndex
+    `index` over it to `directory`, with the index's added names folded
+    into its arrays.
+    """
+    path = os.path.join(directory, SNAPSHOT_DIR)
+    manifest = fingerprint(directory)
+
+    # Build the snapshot beside the old one and swap it in when complete
+    staging = path + ".tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    def write(name, array):
+        np.save(os.path.join(staging, f"{name}.npy"), array)
+
+    def write_table(name, table):
+        write(f"{name}.offsets", table.offsets)
+        write(f"{name}.data", table.data)
+
+    for name in ARRAYS:
+        write(name, getattr(graph, name))
+    tables = {name: StringTable.from_strings(getattr(graph, name)) for name in TABLES}
+    for name, table in tables.items():
+        write_table(name, table)
+    write("person_order", id_order(graph.person_index, tables["person_ids"]))
+    write("movie_order", id_order(graph.movie_index, tables["movie_ids"]))
+
+    person_index = {person_id: i for i, person_id in enumerate(tables["person_ids"])}
+    name_table = NameTable.build(names, person_index, tables["person_ids"])
+    write_table("name_keys", name_table.keys_table)
+    write("name_offsets", name_table.offsets)
+    write("name_people", name_table.people)
+    index = index.compacted()
+    for name in name_index.ARRAYS:
+        write(f"name_index_{name}", getattr(index, name))
+
+    with open(os.path.join(staging, "manifest.json"), "w") as f:
+        json.dump(manifest, f)
+
+    for filename in KEPT_FILES:
+        try:
+            os.replace(os.path.join(path, filename), os.path.join(staging, filename))
+        except FileNotFoundError:
+            pass
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(staging, path)
+
+
+def id_order(index, table):
+    """
+    Returns the sorted order of the ids in `table`, reusing that of
+    `index` if it is a StringIndex over the same, unchanged table.
+    """
+    if isinstance(index, StringIndex) and index.table is table and not index.extra:
+        return index.order
+    return StringIndex.build(table).order
@@ -0,0 +1,215 @@
+"""
+Compact string tables for the csr backend.
+
+A StringTable keeps a column of strings (ids, names, titles) as one
+UTF-8 byte array and an array of offsets into it, so a snapshot can
+memory-map it and a string is only decoded when it is looked up. A
+StringIndex maps the strings of a table back to their positions, and a
+NameTable is degrees.names (lowercased names to sets of person_ids) in
+the same form; both binary search arrays sorted by the UTF-8 bytes,
+which sort like the strings themselves.
+
+All three accept additions (see Graph.extend and degrees.apply_delta),
+which are kept in plain Python containers beside the arrays.
+"""
+
+from collections.abc import MutableMapping, Sequence
+
+import numpy as np
+
+
+class StringTable(Sequence):
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+        self.size = len(offsets) - 1
+
+        # Strings appended since the table was built
+        self.extra = []
+
+    @classmethod
+    def from_strings(cls, strings):
+        """
+        Returns a table of the strings, or `strings` itself if it is
+        already a table with nothing appended.
+        """
+        if isinstance(strings, StringTable) and not strings.extra:
+            return strings
+        encoded = [string.encode("utf-8") for string in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)),
+                  out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(offsets, data)
+
+    def encoded(self, i):
+        """
+        Returns string i as UTF-8 bytes.
+        """
+        if i >= self.size:
+            return self.extra[i - self.size].encode("utf-8")
+        return self.data[self.offsets[i]:self.offsets[i + 1]].tobytes()
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+            if i < 0:
+                raise IndexError("string table index out of range")
+        if i >= self.size:
+            return self.extra[i - self.size]
+        return self.data[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+    def __len__(self):
+        return self.size + len(self.extra)
+
+    def __iter__(self):
+        data = self.data.tobytes()
+        offsets = self.offsets.tolist()
+        for start, end in zip(offsets, offsets[1:]):
+            yield data[start:end].decode("utf-8")
+        yield from self.extra
+
+    def append(self, string):
+        self.extra.append(string)
+
+
+class StringIndex(MutableMapping):
+    """
+    Maps each string of a StringTable to its position. `order` holds the
+    table's positions sorted by their strings.
+    """
+    def __init__(self, table, order):
+        self.table = table
+        self.order = order
+
+        # Positions of strings added since the index was built
+        self.extra = {}
+
+    @classmethod
+    def build(cls, table):
+        """
+        Sorts the positions of a StringTable by their strings.
+        """
+        strings = list(table)
+        order = sorted(range(len(strings)), key=strings.__getitem__)
+        return cls(table, np.array(order, dtype=np.int64))
+
+    def __getitem__(self, key):
+        if key in self.extra:
+            return self.extra[key]
+        i = search(self.table, key.encode("utf-8"), self.order)
+        if i is None:
+            raise KeyError(key)
+        return int(self.order[i])
+
+    def __setitem__(self, key, position):
+        self.extra[key] = position
+
+    def __delitem__(self, key):
+        raise TypeError("strings cannot be removed from a StringIndex")
+
+    def __iter__(self):
+        return iter(self.table)
+
+    def __len__(self):
+        return len(self.table)
+
+
+class NameTable(MutableMapping):
+    """
+    Maps lowercased names to sets of person_ids, like degrees.names.
+    `keys` is a StringTable of the names in sorted order, and the people
+    with name i are people[offsets[i]:offsets[i + 1]], as positions in
+    the `person_ids` StringTable.
+    """
+    def __init__(self, keys, offsets, people, person_ids):
+        self.keys_table = keys
+        self.offsets = offsets
+        self.people = people
+        self.person_ids = person_ids
+
+        # Sets already decoded or added since loading, so changes to them stick
+        self.sets = {}
+        self.added = 0
+
+    @classmethod
+    def build(cls, names, person_index, person_ids):
+        """
+        Builds the table from a mapping of names to sets of person_ids.
+        """
+        items = sorted(names.items())
+        keys = [key for key, _ in items]
+        sets = [person_ids for _, person_ids in items]
+        offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, sets), dtype=np.int64, count=len(sets)), out=offsets[1:])
+        people = np.array([person_index[person_id] for people in sets for person_id in people],
+                          dtype=np.int32)
+        return cls(StringTable.from_strings(keys), offsets, people, person_ids)
+
+    def __getitem__(self, key):
+        if key in self.sets:
+            return self.sets[key]
+        i = search(self.keys_table, key.encode("utf-8"))
+        if i is None:
+            raise KeyError(key)
+        people = self.people[self.offsets[i]:self.offsets[i + 1]].tolist()
+        self.sets[key] = {self.person_ids[person] for person in people}
+        return self.sets[key]
+
+    def __setitem__(self, key, person_ids):
+        if key not in self.sets and search(self.keys_table, key.encode("utf-8")) is None:
+            self.added += 1
+        self.sets[key] = person_ids
+
+    def __delitem__(self, key):
+        raise TypeError("names cannot be removed from a NameTable")
+
+    def __iter__(self):
+        yield from self.keys_table
+        for key in self.sets:
+            if search(self.keys_table, key.encode("utf-8")) is None:
+                yield key
+
+    def __len__(self):
+        return len(self.keys_table) + self.added
+
+    def items(self):
+        """
+        Yields every (name, person_ids) pair, decoding the sets in one pass.
+        """
+        offsets = self.offsets.tolist()
+        people = self.people.tolist()
+        person_ids = list(self.person_ids)
+        for i, key in enumerate(self.keys_table):
+            if key in self.sets:
+                yield key, self.sets[key]
+            else:
+                yield key, {person_ids[person] for person in people[offsets[i]:offsets[i + 1]]}
+        for key in self.sets:
+            if search(self.keys_table, key.encode("utf-8")) is None:
+                yield key, self.sets[key]
+
+
+def search(table, key, order=None):
+    """
+    Binary search for the UTF-8 bytes `key` among the strings of a
+    StringTable, in the table's own order or, if given, in `order`.
+    Returns the position in that order, or None if it is not there.
+    """
+    end = table.size if order is None else len(order)
+    low = 0
+    high = end
+    while low < high:
+        middle = (low + high) // 2
+        position = middle if order is None else int(order[middle])
+        if table.encoded(position) < key:
+            low = middle + 1
+        else:
+            high = middle
+    if low < end:
+        position = low if order is None else int(order[low])
+        if table.encoded(position) == key:
+            return low
+    return None
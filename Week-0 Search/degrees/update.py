@@ -0,0 +1,82 @@
+"""
+Apply a delta of new credits to a dataset without a full reload.
+
+The delta directory holds people.csv, movies.csv and/or stars.csv with the
+new rows. They are applied to the dataset's snapshot and landmark index
+(if any) in memory, appended to the dataset's CSV files, and the snapshot
+and index are then written back for the new CSV fingerprint.
+"""
+
+import argparse
+import csv
+import os
+import sys
+
+import degrees
+import landmarks
+import snapshot
+
+COLUMNS = {
+    "people.csv": ["id", "name", "birth"],
+    "movies.csv": ["id", "title", "year"],
+    "stars.csv": ["person_id", "movie_id"],
+}
+
+
+def append_rows(directory, filename, rows):
+    """
+    Appends rows (dicts) to one of the dataset's CSV files.
+    """
+    if not rows:
+        return
+    path = os.path.join(directory, filename)
+
+    # Start on a new line even if the file does not end with one
+    missing_newline = False
+    if os.path.getsize(path) > 0:
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            missing_newline = f.read(1) != b"\n"
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        if missing_newline:
+            f.write("\n")
+        writer = csv.DictWriter(f, fieldnames=COLUMNS[filename], extrasaction="ignore",
+                                lineterminator="\n")
+        writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory", help="dataset to update")
+    parser.add_argument("delta", help="directory of CSV files with the new rows")
+    args = parser.parse_args()
+
+    try:
+        new_people, new_movies, new_stars = degrees.read_delta(args.delta)
+    except (OSError, ValueError) as e:
+        sys.exit(str(e))
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory, backend="csr")
+
+    # Must be loaded before the CSV files change, or it reads as out of date
+    degrees.landmark_index = landmarks.load(args.directory)
+
+    new_people = [row for row in new_people if row["id"] not in degrees.people]
+    new_movies = [row for row in new_movies if row["id"] not in degrees.movies]
+    new_stars = degrees.filter_stars(new_people, new_movies, new_stars)
+    affected = degrees.apply_delta(new_people, new_movies, new_stars)
+
+    append_rows(args.directory, "people.csv", new_people)
+    append_rows(args.directory, "movies.csv", new_movies)
+    append_rows(args.directory, "stars.csv", new_stars)
+    snapshot.save(args.directory, degrees.graph, degrees.names, degrees.name_index)
+    if degrees.landmark_index is not None:
+        degrees.landmark_index.save(args.directory)
+
+    print(f"Added {len(new_people)} people, {len(new_movies)} movies and "
+          f"{len(new_stars)} stars; {len(affected)} components changed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Solve many mazes in parallel.
+
+Takes maze files, directories of them (every *.txt inside) or glob
+patterns, solves each one in a pool of worker processes with the chosen
+strategy, and prints one JSON object per maze as soon as it is solved:
+
+    {"maze": "mazes/a.txt", "strategy": "bfs", "solved": true,
+     "length": 30, "explored": 77, "seconds": 0.0004}
+
+Unsolvable or invalid mazes get "solved": false and an "error" instead.
+An image of each solution is saved next to its maze unless --no-images.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+from maze import ARRAY_STRATEGIES, STRATEGIES, Maze
+
+
+def maze_files(patterns):
+    """
+    Expands files, directories and glob patterns into a sorted list of
+    maze files without repeats.
+    """
+    filenames = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            filenames.update(glob.glob(os.path.join(pattern, "*.txt")))
+        else:
+            filenames.update(glob.glob(pattern))
+    return sorted(filenames)
+
+
+def solve(task):
+    """
+    Solves one maze and returns its result as a dict.
+    """
+    filename, strategy, images = task
+    result = {"maze": filename, "strategy": strategy}
+    start = time.perf_counter()
+    try:
+        maze = Maze(filename, backend="numpy" if strategy in ARRAY_STRATEGIES else "list")
+        maze.solve(strategy)
+    except Exception as e:
+        result["solved"] = False
+        result["error"] = str(e)
+        result["seconds"] = round(time.perf_counter() - start, 6)
+        return result
+    result["solved"] = True
+    result["length"] = len(maze.solution[0])
+    result["explored"] = maze.num_explored
+    result["seconds"] = round(time.perf_counter() - start, 6)
+    if images:
+        maze.output_image(os.path.splitext(filename)[0] + ".png", show_explored=True)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("mazes", nargs="+", help="maze files, directories or glob patterns")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="astar")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of processes (default: one per CPU)")
+    parser.add_argument("--no-images", action="store_true",
+                        help="do not save an image of each solution")
+    args = parser.parse_args()
+
+    filenames = maze_files(args.mazes)
+    if not filenames:
+        sys.exit("No mazes found.")
+    tasks = [(filename, args.strategy, not args.no_images) for filename in filenames]
+
+    # Hand out small mazes in batches, so workers are not kept waiting
+    chunksize = max(1, len(tasks) // (args.workers * 16))
+
+    start = time.perf_counter()
+    solved = 0
+    with Pool(args.workers) as pool:
+        for result in pool.imap_unordered(solve, tasks, chunksize):
+            solved += result["solved"]
+            print(json.dumps(result), flush=True)
+    print(f"Solved {solved} of {len(tasks)} mazes in {time.perf_counter() - start:.2f}s.",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark Jump Point Search against plain A* on large open mazes.
+
+Generates seeded mazes with generate.py at a few levels of openness,
+solves each with both strategies, checks that the paths are equally
+short and reports the states explored and the time taken.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import generate
+from maze import Maze
+
+
+def run(filename, strategy):
+    maze = Maze(filename)
+    start = time.perf_counter()
+    maze.solve(strategy)
+    return maze, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=250, help="rooms down each maze")
+    parser.add_argument("--cols", type=int, default=250, help="rooms across each maze")
+    parser.add_argument("--loops", type=float, nargs="+", default=[0.25, 0.5, 0.75, 1.0],
+                        help="openness of the mazes, see generate.py")
+    parser.add_argument("--mazes", type=int, default=3, help="mazes per level of openness")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'loops':>5} {'maze':>4} {'length':>7} {'astar':>9} {'jps':>9} "
+          f"{'astar s':>8} {'jps s':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "maze.txt")
+        for loops in args.loops:
+            for i in range(args.mazes):
+                with open(filename, "w") as f:
+                    for line in generate.generate(args.rows, args.cols, loops, rng):
+                        f.write(line + "\n")
+                astar, astar_time = run(filename, "astar")
+                jps, jps_time = run(filename, "jps")
+                length = len(astar.solution[0])
+                if len(jps.solution[0]) != length:
+                    raise Exception(f"jps found a path of {len(jps.solution[0])}, not {length}")
+                print(f"{loops:>5} {i:>4} {length:>7} {astar.num_explored:>9} "
+                      f"{jps.num_explored:>9} {astar_time:>8.3f} {jps_time:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Generate large random mazes for maze.py.
+
+The maze is carved by a randomized depth-first search over a grid of
+rooms, so there is exactly one path between any two cells. `--loops`
+then knocks down that fraction of the remaining inner walls, which opens
+up alternative routes and, near 1, turns the maze into open floor.
+The start is in the top-left room and the goal in the bottom-right.
+"""
+
+import argparse
+import random
+
+
+def generate(rows, cols, loops=0.0, rng=random):
+    """
+    Returns the lines of a maze of rows x cols rooms, drawn with "#" for
+    walls, so the text is 2 * rows + 1 lines of 2 * cols + 1 characters.
+    """
+    if rows < 1 or cols < 1 or rows * cols < 2:
+        raise ValueError("maze must have at least two rooms, for the start and the goal")
+    height = 2 * rows + 1
+    width = 2 * cols + 1
+    grid = [["#"] * width for _ in range(height)]
+
+    # Carve passages with an explicit stack, so big mazes do not recurse
+    grid[1][1] = " "
+    stack = [(0, 0)]
+    while stack:
+        row, col = stack[-1]
+        unvisited = [
+            (r, c)
+            for r, c in [(row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)]
+            if 0 <= r < rows and 0 <= c < cols and grid[2 * r + 1][2 * c + 1] == "#"
+        ]
+        if not unvisited:
+            stack.pop()
+            continue
+        r, c = rng.choice(unvisited)
+        grid[row + r + 1][col + c + 1] = " "
+        grid[2 * r + 1][2 * c + 1] = " "
+        stack.append((r, c))
+
+    # Knock down inner walls between two rooms at random
+    if loops > 0:
+        for i in range(1, height - 1):
+            for j in range(1, width - 1):
+                if grid[i][j] == "#" and (i % 2) != (j % 2) and rng.random() < loops:
+                    grid[i][j] = " "
+
+    grid[1][1] = "A"
+    grid[height - 2][width - 2] = "B"
+    return ["".join(row) for row in grid]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("filename")
+    parser.add_argument("--rows", type=int, default=100, help="rooms down the maze")
+    parser.add_argument("--cols", type=int, default=100, help="rooms across the maze")
+    parser.add_argument("--loops", type=float, default=0.0,
+                        help="fraction of remaining inner walls to remove")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    if args.rows < 1 or args.cols < 1 or args.rows * args.cols < 2:
+        parser.error("the maze needs at least two rooms, for the start and the goal")
+
+    rng = random.Random(args.seed)
+    with open(args.filename, "w") as f:
+        for line in generate(args.rows, args.cols, args.loops, rng):
+            f.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,58 @@
+import heapq
+import itertools
+import os
 import sys
+from collections import deque
+
+STRATEGIES = ["dfs", "bfs", "greedy", "astar", "jps", "wavefront", "goal"]
+
+# Strategies that work on a NumPy array of the maze, best loaded with
+# backend="numpy"
+ARRAY_STRATEGIES = ["wavefront", "goal"]
+
+# What is drawn in each cell, as an index into COLORS and CHARS
+EMPTY_CELL, WALL_CELL, START_CELL, GOAL_CELL, SOLUTION_CELL, EXPLORED_CELL, BORDER = range(7)
+COLORS = [
+    (237, 240, 252), (40, 40, 40), (255, 0, 0), (0, 171, 28),
+    (220, 235, 113), (212, 97, 85), (0, 0, 0)
+]
+CHARS = " █AB*  "
+
+# Change in (row, col) for each action
+DIRECTIONS = {"up": (-1, 0), "down": (1, 0), "left": (0, -1), "right": (0, 1)}
+
+# Cell values in the wavefront search, besides distances modulo 3
+WALL = 254
+UNSEEN = 255
+
+# Fronts narrower than this are expanded cell by cell rather than with
+# NumPy, which only pays off for a wide front
+WIDE_FRONT = 64
 
 class Node():
-    def __init__(self, state, parent, action):
+    def __init__(self, state, parent, action, cost=0):
         self.state = state
         self.parent = parent
         self.action = action
 
+        # Number of steps from the start
+        self.cost = cost
+
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+
+        # Number of nodes in the frontier for each state, so that
+        # contains_state is a dictionary lookup instead of a scan
+        self.states = {}
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -24,10 +61,17 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self.discard(node.state)
             return node
 
+    def discard(self, state):
+        count = self.states[state] - 1
+        if count:
+            self.states[state] = count
+        else:
+            del self.states[state]
+
 
 class QueueFrontier(StackFrontier):
 
@@ -35,15 +79,235 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self.discard(node.state)
             return node
 
+
+class PriorityFrontier():
+    """
+    Binary heap of nodes, removed lowest `priority(node)` first.
+
+    A state can be added again with a cheaper node; the heap entry of
+    the old node is skipped when it comes up, rather than searched for.
+    """
+    def __init__(self, priority):
+        self.frontier = []
+        self.priority = priority
+
+        # Latest node added for each state in the frontier
+        self.best = {}
+
+        # Breaks ties between equal priorities in insertion order
+        self.counter = itertools.count()
+
+    def add(self, node):
+        self.best[node.state] = node
+        heapq.heappush(self.frontier, (self.priority(node), next(self.counter), node))
+
+    def contains_state(self, state):
+        return state in self.best
+
+    def cost(self, state):
+        return self.best[state].cost
+
+    def empty(self):
+        return len(self.best) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        while True:
+            _, _, node = heapq.heappop(self.frontier)
+            if self.best.get(node.state) is node:
+                del self.best[node.state]
+                return node
+
+
+class CellMask():
+    """
+    Read-only set of (row, col) cells backed by a NumPy boolean array.
+    """
+    def __init__(self, mask):
+        self.mask = mask
+
+    def __contains__(self, cell):
+        return bool(self.mask[cell])
+
+    def __iter__(self):
+        return zip(*(indices.tolist() for indices in self.mask.nonzero()))
+
+    def __len__(self):
+        return int(self.mask.sum())
+
+
+def wall_array(lines, width):
+    """
+    Parses the lines of a maze into a NumPy boolean array of walls,
+    treating missing characters at the end of short lines as open.
+    """
+    import numpy as np
+    text = "".join(line.ljust(width) for line in lines)
+    try:
+        codes = np.frombuffer(text.encode("ascii"), dtype=np.uint8)
+    except UnicodeEncodeError:
+        codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    walls = (codes != ord(" ")) & (codes != ord("A")) & (codes != ord("B"))
+    return walls.reshape(len(lines), width)
+
+
+def cell_mask(cells, shape):
+    """
+    Returns a NumPy boolean array of the given shape marking cells, an
+    iterable of (row, col) pairs or a CellMask.
+    """
+    import numpy as np
+    if isinstance(cells, CellMask):
+        return cells.mask
+    mask = np.zeros(shape, dtype=bool)
+    cells = list(cells)
+    if cells:
+        rows, cols = zip(*cells)
+        mask[list(rows), list(cols)] = True
+    return mask
+
+
+def padded_field(walls, dtype, wall, unseen):
+    """
+    Returns a flat NumPy array of the maze surrounded by a ring of walls,
+    so that every open cell has four neighbors, holding `wall` or
+    `unseen` for each cell, and the width of the padded rows.
+    """
+    import numpy as np
+    walls = np.asarray(walls, dtype=bool)
+    height, width = walls.shape
+    field = np.full((height + 2, width + 2), wall, dtype=dtype)
+    field[1:-1, 1:-1] = np.where(walls, wall, unseen)
+    return field.ravel(), width + 2
+
+
+def expand_front(field, cells, front, steps, mark, unseen):
+    """
+    One level of a wavefront search over the flat array `field`, of
+    which `cells` is a memoryview: marks every unseen neighbor of the
+    cells in front with `mark` and returns them as the next front.
+    """
+    if len(front) < WIDE_FRONT:
+        if not isinstance(front, list):
+            front = front.tolist()
+        next_front = []
+        for cell in front:
+            for step in steps:
+                neighbor = cell + step
+                if cells[neighbor] == unseen:
+                    cells[neighbor] = mark
+                    next_front.append(neighbor)
+        return next_front
+
+    import numpy as np
+    neighbors = (np.asarray(front)[:, None] + np.array(steps)).ravel()
+    front = np.unique(neighbors[field[neighbors] == unseen])
+    field[front] = mark
+    return front
+
+
+def field_filename(filename):
+    """
+    Returns the name of the goal field file kept next to a maze file.
+    """
+    return os.path.splitext(filename)[0] + ".field.npz"
+
+
+class GoalField():
+    """
+    Distance from every cell of a maze to its goal, from one breadth-first
+    search outwards from the goal. The path from any cell then follows
+    the distances down to 0, without searching.
+    """
+
+    def __init__(self, distances, goal, walls):
+
+        # int32 distance of each cell to the goal, -1 if it cannot reach it
+        self.distances = distances
+        self.goal = goal
+
+        # Walls of the maze, packed to bits, to tell if it changed
+        self.walls = walls
+
+    @classmethod
+    def build(cls, maze):
+        import numpy as np
+        field, width = padded_field(maze.walls, np.int32, -2, -1)
+        cells = memoryview(field)
+        steps = [-width, width, -1, 1]
+        goal = (maze.goal[0] + 1) * width + maze.goal[1] + 1
+        cells[goal] = 0
+        front = [goal]
+        distance = 0
+        while len(front):
+            distance += 1
+            front = expand_front(field, cells, front, steps, distance, -1)
+        distances = field.reshape(-1, width)[1:-1, 1:-1].copy()
+        distances[distances < 0] = -1
+        return cls(distances, maze.goal, np.packbits(np.asarray(maze.walls, dtype=bool)))
+
+    @classmethod
+    def load(cls, filename):
+        import numpy as np
+        with np.load(filename) as data:
+            return cls(data["distances"], tuple(data["goal"].tolist()), data["walls"])
+
+    def save(self, filename):
+        import numpy as np
+        with open(filename, "wb") as f:
+            np.savez_compressed(f, distances=self.distances, goal=np.array(self.goal),
+                                walls=self.walls)
+
+    def matches(self, maze):
+        """
+        Returns True if the field was built for this maze.
+        """
+        import numpy as np
+        return (self.goal == maze.goal
+                and self.distances.shape == (maze.height, maze.width)
+                and np.array_equal(self.walls, np.packbits(np.asarray(maze.walls, dtype=bool))))
+
+    def path(self, start):
+        """
+        Returns the (actions, cells) solution from start to the goal,
+        or None if there is no path.
+        """
+        height, width = self.distances.shape
+        distances = memoryview(self.distances.reshape(-1))
+        moves = list(DIRECTIONS.items())
+        row, col = start
+        distance = distances[row * width + col]
+        if distance < 0:
+            return None
+        actions = []
+        cells = []
+        while distance > 0:
+            distance -= 1
+            for action, (dr, dc) in moves:
+                r, c = row + dr, col + dc
+                if 0 <= r < height and 0 <= c < width and distances[r * width + c] == distance:
+                    row, col = r, c
+                    actions.append(action)
+                    cells.append((row, col))
+                    break
+        return actions, cells
+
+
 class Maze():
 
-    def __init__(self, filename):
+    def __init__(self, filename, backend="list"):
+        """
+        Reads a maze from filename. With backend="numpy", walls are kept
+        as a NumPy boolean array instead of a list of lists of bools.
+        """
 
         # Read file and set height and width of maze
+        self.filename = filename
         with open(filename) as f:
             contents = f.read()
 
@@ -59,6 +323,16 @@ class Maze():
         self.width = max(len(line) for line in contents)
 
         # Keep track of walls
+        if backend == "numpy":
+            self.walls = wall_array(contents, self.width)
+            for i, line in enumerate(contents):
+                if "A" in line:
+                    self.start = (i, line.index("A"))
+                if "B" in line:
+                    self.goal = (i, line.index("B"))
+            self.solution = None
+            return
+
         self.walls = []
         for i in range(self.height):
             row = []
@@ -82,22 +356,30 @@ class Maze():
 
 
     def print(self):
-        solution = self.solution[1] if self.solution is not None else None
-        print()
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
-                if col:
-                    print("█", end="")
-                elif (i, j) == self.start:
-                    print("A", end="")
-                elif (i, j) == self.goal:
-                    print("B", end="")
-                elif solution is not None and (i, j) in solution:
-                    print("*", end="")
-                else:
-                    print(" ", end="")
-            print()
-        print()
+        import numpy as np
+        chars = np.array(list(CHARS))[self.cell_kinds(show_solution=True, show_explored=False)]
+
+        # Each row of single characters, viewed as one string
+        rows = chars.view(f"<U{self.width}").ravel().tolist()
+        print("\n" + "\n".join(rows) + "\n")
+
+
+    def cell_kinds(self, show_solution, show_explored):
+        """
+        Returns a NumPy array holding what to draw in each cell, as an
+        index into COLORS and CHARS.
+        """
+        import numpy as np
+        kinds = np.where(np.asarray(self.walls, dtype=bool), WALL_CELL, EMPTY_CELL).astype(np.uint8)
+        if self.solution is not None:
+            open_cells = kinds == EMPTY_CELL
+            if show_explored:
+                kinds[open_cells & cell_mask(self.explored, kinds.shape)] = EXPLORED_CELL
+            if show_solution:
+                kinds[open_cells & cell_mask(self.solution[1], kinds.shape)] = SOLUTION_CELL
+        kinds[self.goal] = GOAL_CELL
+        kinds[self.start] = START_CELL
+        return kinds
 
 
     def neighbors(self, state):
@@ -116,15 +398,41 @@ class Maze():
         return result
 
 
-    def solve(self):
-        """Finds a solution to maze, if one exists."""
+    def heuristic(self, state):
+        """Manhattan distance from state to the goal."""
+        return abs(state[0] - self.goal[0]) + abs(state[1] - self.goal[1])
+
+
+    def solve(self, strategy="dfs"):
+        """
+        Finds a solution to maze, if one exists, with one of STRATEGIES:
+        depth-first, breadth-first, greedy best-first or A* search.
+        """
+        if strategy not in STRATEGIES:
+            raise Exception(f"unknown strategy {strategy!r}")
+        if strategy == "jps":
+            return self.solve_jps()
+        if strategy == "wavefront":
+            return self.solve_wavefront()
+        if strategy == "goal":
+            return self.solve_goal()
 
         # Keep track of number of states explored
         self.num_explored = 0
 
         # Initialize frontier to just the starting position
         start = Node(state=self.start, parent=None, action=None)
-        frontier = StackFrontier()
+        if strategy == "dfs":
+            frontier = StackFrontier()
+        elif strategy == "bfs":
+            frontier = QueueFrontier()
+        elif strategy == "greedy":
+            frontier = PriorityFrontier(lambda node: self.heuristic(node.state))
+        else:
+
+            # Among equal estimates, prefer nodes closer to the goal
+            frontier = PriorityFrontier(lambda node: (
+                node.cost + self.heuristic(node.state), self.heuristic(node.state)))
         frontier.add(start)
 
         # Initialize an empty explored set
@@ -157,73 +465,243 @@ class Maze():
             # Mark node as explored
             self.explored.add(node.state)
 
-            # Add neighbors to frontier
+            # Add neighbors to frontier; A* also replaces a frontier
+            # node when it finds a shorter way to the same state
             for action, state in self.neighbors(node.state):
-                if not frontier.contains_state(state) and state not in self.explored:
-                    child = Node(state=state, parent=node, action=action)
-                    frontier.add(child)
+                if state in self.explored:
+                    continue
+                cost = node.cost + 1
+                if frontier.contains_state(state):
+                    if strategy != "astar" or frontier.cost(state) <= cost:
+                        continue
+                child = Node(state=state, parent=node, action=action, cost=cost)
+                frontier.add(child)
+
+
+    def is_open(self, row, col):
+        return 0 <= row < self.height and 0 <= col < self.width and not self.walls[row][col]
+
+
+    def jump(self, state, action):
+        """
+        Moves from state in the direction of action until it reaches a
+        jump point, and returns it, or None if it hits a wall first.
+
+        Shortest paths are taken to make vertical moves before horizontal
+        ones wherever they can. So a horizontal run only stops where a
+        vertical move is forced (the cell diagonally behind is a wall),
+        and a vertical run stops wherever a horizontal run from it would.
+        """
+        dr, dc = DIRECTIONS[action]
+        row, col = state
+        while True:
+            row += dr
+            col += dc
+            if not self.is_open(row, col):
+                return None
+            if (row, col) == self.goal:
+                return (row, col)
+            if dr == 0:
+                for vertical in [-1, 1]:
+                    if self.is_open(row + vertical, col) and not self.is_open(row + vertical, col - dc):
+                        return (row, col)
+            elif self.jump((row, col), "left") or self.jump((row, col), "right"):
+                return (row, col)
+
+
+    def jump_actions(self, state, action):
+        """
+        Directions worth jumping in from state, reached by moving in
+        the direction of action (or None at the start).
+        """
+        if action is None:
+            return list(DIRECTIONS)
+        dr, dc = DIRECTIONS[action]
+        if dc == 0:
+            return [action, "left", "right"]
+        row, col = state
+        actions = [action]
+        for vertical in ["up", "down"]:
+            vr = DIRECTIONS[vertical][0]
+            if self.is_open(row + vr, col) and not self.is_open(row + vr, col - dc):
+                actions.append(vertical)
+        return actions
+
+
+    def solve_jps(self):
+        """
+        Jump Point Search: A* that only puts jump points in the frontier,
+        skipping over the many equally short paths an open grid has.
+        States are (cell, direction) pairs, since what is worth exploring
+        from a cell depends on how it was entered.
+        """
+        self.num_explored = 0
+        start = Node(state=(self.start, None), parent=None, action=None)
+        frontier = PriorityFrontier(lambda node: (
+            node.cost + self.heuristic(node.state[0]), self.heuristic(node.state[0])))
+        frontier.add(start)
+        self.explored = set()
+        expanded = set()
+
+        while True:
+            if frontier.empty():
+                raise Exception("no solution")
+            node = frontier.remove()
+            self.num_explored += 1
+            cell, action = node.state
+
+            if cell == self.goal:
+
+                # Fill in the straight runs between jump points
+                actions = []
+                cells = []
+                while node.parent is not None:
+                    cell, action = node.state
+                    dr, dc = DIRECTIONS[action]
+                    for _ in range(node.cost - node.parent.cost):
+                        actions.append(action)
+                        cells.append(cell)
+                        cell = (cell[0] - dr, cell[1] - dc)
+                    node = node.parent
+                actions.reverse()
+                cells.reverse()
+                self.solution = (actions, cells)
+                return
+
+            expanded.add(node.state)
+            self.explored.add(cell)
+            for direction in self.jump_actions(cell, action):
+                point = self.jump(cell, direction)
+                if point is None or (point, direction) in expanded:
+                    continue
+                cost = node.cost + abs(point[0] - cell[0]) + abs(point[1] - cell[1])
+                if frontier.contains_state((point, direction)):
+                    if frontier.cost((point, direction)) <= cost:
+                        continue
+                frontier.add(Node(state=(point, direction), parent=node, action=direction, cost=cost))
+
+
+    def solve_wavefront(self):
+        """
+        Breadth-first search as a wavefront over a NumPy array of the
+        maze: each step marks every open, unseen neighbor of the whole
+        front at once. Cells only store their distance from the start
+        modulo 3, one byte each. That is enough to walk back from the
+        goal, because a cell's neighbors are at most one step nearer or
+        further, so the previous step is the neighbor one less mod 3.
+        """
+        import numpy as np
+
+        field, width = padded_field(self.walls, np.uint8, WALL, UNSEEN)
+        cells = memoryview(field)
+        moves = [("up", -width), ("down", width), ("left", -1), ("right", 1)]
+        steps = [step for _, step in moves]
+        start = (self.start[0] + 1) * width + self.start[1] + 1
+        goal = (self.goal[0] + 1) * width + self.goal[1] + 1
+
+        # Keep track of number of states explored
+        self.num_explored = 0
+
+        cells[start] = 0
+        front = [start]
+        distance = 0
+        while cells[goal] == UNSEEN:
+            if len(front) == 0:
+                raise Exception("no solution")
+            self.num_explored += len(front)
+            distance += 1
+            front = expand_front(field, cells, front, steps, distance % 3, UNSEEN)
+        self.num_explored += 1
+
+        # Walk back from the goal, one step nearer the start at a time
+        actions = []
+        path = []
+        cell = goal
+        while cell != start:
+            distance -= 1
+            for action, step in moves:
+                if cells[cell - step] == distance % 3:
+                    actions.append(action)
+                    path.append(divmod(cell, width))
+                    cell -= step
+                    break
+        actions.reverse()
+        path.reverse()
+        self.solution = (actions, [(i - 1, j - 1) for i, j in path])
+        self.explored = CellMask(field.reshape(-1, width)[1:-1, 1:-1] < 3)
+
+
+    def goal_field(self):
+        """
+        Returns the GoalField of this maze, loading it from the file next
+        to the maze if it is there and up to date, and building and saving
+        it otherwise.
+        """
+        filename = field_filename(self.filename)
+        try:
+            field = GoalField.load(filename)
+        except (OSError, ValueError, KeyError):
+            field = None
+        if field is None or not field.matches(self):
+            field = GoalField.build(self)
+            try:
+                field.save(filename)
+            except OSError:
+                pass
+        return field
+
+
+    def solve_goal(self):
+        """
+        Follows the goal field from the start, without any search.
+        """
+        self.num_explored = 0
+        self.solution = self.goal_field().path(self.start)
+        if self.solution is None:
+            raise Exception("no solution")
+        self.explored = set()
 
 
     def output_image(self, filename, show_solution=True, show_explored=False):
-        from PIL import Image, ImageDraw
+        import numpy as np
+        from PIL import Image
         cell_size = 50
         cell_border = 2
 
-        # Create a blank canvas
-        img = Image.new(
-            "RGBA",
-            (self.width * cell_size, self.height * cell_size),
-            "black"
-        )
-        draw = ImageDraw.Draw(img)
-
-        solution = self.solution[1] if self.solution is not None else None
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
-
-                # Walls
-                if col:
-                    fill = (40, 40, 40)
-
-                # Start
-                elif (i, j) == self.start:
-                    fill = (255, 0, 0)
-
-                # Goal
-                elif (i, j) == self.goal:
-                    fill = (0, 171, 28)
-
-                # Solution
-                elif solution is not None and show_solution and (i, j) in solution:
-                    fill = (220, 235, 113)
-
-                # Explored
-                elif solution is not None and show_explored and (i, j) in self.explored:
-                    fill = (212, 97, 85)
-
-                # Empty cell
-                else:
-                    fill = (237, 240, 252)
-
-                # Draw cell
-                draw.rectangle(
-                    ([(j * cell_size + cell_border, i * cell_size + cell_border),
-                      ((j + 1) * cell_size - cell_border, (i + 1) * cell_size - cell_border)]),
-                    fill=fill
-                )
-
+        # RGBA colour of each cell, as one uint32 per pixel
+        palette = np.array([color + (255,) for color in COLORS], dtype=np.uint8).view(np.uint32)
+        colors = palette[self.cell_kinds(show_solution, show_explored), 0]
+
+        # Each cell scaled up to a block of pixels, then the border strips
+        # of every block painted over through a (row, y, column, x) view
+        pixels = np.repeat(np.repeat(colors, cell_size, axis=0), cell_size, axis=1)
+        blocks = pixels.reshape(self.height, cell_size, self.width, cell_size)
+        border = palette[BORDER, 0]
+        blocks[:, :cell_border] = border
+        blocks[:, cell_size - cell_border + 1:] = border
+        blocks[..., :cell_border] = border
+        blocks[..., cell_size - cell_border + 1:] = border
+
+        img = Image.fromarray(pixels.view(np.uint8).reshape(*pixels.shape, 4))
         img.save(filename)
 
 
-if len(sys.argv) != 2:
-    sys.exit("Usage: python maze.py maze.txt")
+def main():
+    if len(sys.argv) not in [2, 3] or sys.argv[2:] and sys.argv[2] not in STRATEGIES:
+        sys.exit(f"Usage: python maze.py maze.txt [{'|'.join(STRATEGIES)}]")
+    strategy = sys.argv[2] if len(sys.argv) == 3 else "dfs"
+
+    m = Maze(sys.argv[1], backend="numpy" if strategy in ARRAY_STRATEGIES else "list")
+    print("Maze:")
+    m.print()
+    print("Solving...")
+    m.solve(strategy)
+    print("States Explored:", m.num_explored)
+    print("Solution Length:", len(m.solution[0]))
+    print("Solution:")
+    m.print()
+    m.output_image("maze.png", show_explored=True)
+
 
-m = Maze(sys.argv[1])
-print("Maze:")
-m.print()
-print("Solving...")
-m.solve()
-print("States Explored:", m.num_explored)
-print("Solution:")
-m.print()
-m.output_image("maze.png", show_explored=True)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark the parallel root split against serial minimax on 4 x 4 boards.
+
+Plays seeded random opening moves to get 4 x 4 positions that are not
+over, finds the best move on each with tictactoe.minimax serially and
+with each number of workers (the table emptied before every search),
+checks that every move found is optimal and that the parallel ones all
+agree, and reports the times and the speedup over the serial search.
+"""
+
+import argparse
+import math
+import os
+import random
+import time
+
+import tictactoe as ttt
+
+
+def random_position(marks, rng):
+    """
+    Returns a 4 x 4 board after `marks` random moves that is not over.
+    """
+    while True:
+        board = [[ttt.EMPTY] * 4 for _ in range(4)]
+        for _ in range(marks):
+            i, j = rng.choice(sorted(ttt.actions(board)))
+            board[i][j] = ttt.player(board)
+        if not ttt.terminal(board):
+            return board
+
+
+def timed_minimax(board, workers):
+    ttt.table.clear()
+    start = time.perf_counter()
+    move = ttt.minimax(board, workers=workers)
+    return move, time.perf_counter() - start
+
+
+def value(board):
+    if ttt.terminal(board):
+        return ttt.utility(board)
+    return ttt.min_max_value(board, ttt.player(board), -math.inf, math.inf)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--marks", type=int, nargs="+", default=[4, 5, 6],
+                        help="random moves played before each position")
+    parser.add_argument("--positions", type=int, default=3, help="positions per number of marks")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, os.cpu_count()])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'marks':>5} {'board':>5} {'serial s':>9}"
+          + "".join(f" {f'{workers} procs s':>11} {'speedup':>7}" for workers in args.workers))
+    for marks in args.marks:
+        for i in range(args.positions):
+            board = random_position(marks, rng)
+            serial, serial_time = timed_minimax(board, None)
+            row = f"{marks:>5} {i:>5} {serial_time:>9.3f}"
+            moves = set()
+            for workers in args.workers:
+                move, seconds = timed_minimax(board, workers)
+                moves.add(move)
+                row += f" {seconds:>11.3f} {serial_time / seconds:>7.2f}"
+            if len(moves) != 1:
+                raise Exception(f"parallel searches disagree: {sorted(moves)}")
+
+            ttt.table.clear()
+            best = value(board)
+            for move in moves | {serial}:
+                if value(ttt.result(board, move)) != best:
+                    raise Exception(f"{move} is not an optimal move")
+            print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Bitboard Tic Tac Toe engine
+
+Each side's marks are kept as one integer with a bit per cell (bit
+i * n + j for cell (i, j) of an n x n board), so a move is an XOR, the
+empty cells are what neither mask covers, and a win is a line mask
+fully covered by one side. Only the lines through the last move can
+have been completed by it, so those are precomputed for every cell.
+
+The functions below take and return the same nested-list boards as
+tictactoe.py, so runner.py can use this module in its place; the
+search itself never leaves the masks. to_masks, to_board, mask_winner,
+player and utility_of work on any rows x cols board, and mnk.py uses
+them too.
+"""
+
+import math
+import random
+
+from tictactoe import X, O, EMPTY, EXACT, LOWER, UPPER
+
+# Line masks, and those through each cell, for each board size
+line_cache = {}
+
+# Values of searched positions, keyed by (n, mover, opponent)
+table = {}
+
+
+def lines(n):
+    """
+    Returns the masks of every row, column and diagonal of an n x n
+    board, and a list with the masks through each cell.
+    """
+    if n not in line_cache:
+        masks = []
+        for i in range(n):
+            masks.append(sum(1 << (i * n + j) for j in range(n)))
+            masks.append(sum(1 << (j * n + i) for j in range(n)))
+        masks.append(sum(1 << (i * n + i) for i in range(n)))
+        masks.append(sum(1 << (i * n + n - 1 - i) for i in range(n)))
+        through = [[line for line in masks if line >> cell & 1] for cell in range(n * n)]
+        line_cache[n] = (masks, through)
+    return line_cache[n]
+
+
+def to_masks(board):
+    """
+    Returns the (x, o) masks of a board, with bit i * cols + j for cell (i, j).
+    """
+    cols = len(board[0])
+    x = o = 0
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell == X:
+                x |= 1 << (i * cols + j)
+            elif cell == O:
+                o |= 1 << (i * cols + j)
+    return x, o
+
+
+def to_board(x, o, rows, cols=None):
+    """
+    Returns the rows x cols board (square by default) of the (x, o) masks.
+    """
+    cols = rows if cols is None else cols
+    return [
+        [X if x >> (i * cols + j) & 1 else O if o >> (i * cols + j) & 1 else EMPTY
+         for j in range(cols)]
+        for i in range(rows)
+    ]
+
+
+def completes_line(mask, cell, n):
+    """
+    Returns True if mask covers a whole line through cell.
+    """
+    for line in lines(n)[1][cell]:
+        if mask & line == line:
+            return True
+    return False
+
+
+def mask_winner(x, o, masks):
+    """
+    Returns X or O if either mask covers a whole one of the line
+    `masks`, or None.
+    """
+    for line in masks:
+        if x & line == line:
+            return X
+        if o & line == line:
+            return O
+    return None
+
+
+def negamax(mover, opponent, n, alpha, beta):
+    """
+    Returns the value of the position for the side to move, whose marks
+    are `mover`: 1 for a win, -1 for a loss and 0 for a draw. The
+    opponent has not won yet.
+    """
+    free = ((1 << n * n) - 1) & ~(mover | opponent)
+    if not free:
+        return 0
+
+    key = (n, mover, opponent)
+    entry = table.get(key)
+    if entry is not None:
+        value, flag = entry
+        if flag == EXACT:
+            return value
+        if flag == LOWER:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            return value
+
+    best = -math.inf
+    original_alpha = alpha
+    while free:
+        move = free & -free
+        free ^= move
+        marks = mover ^ move
+        if completes_line(marks, move.bit_length() - 1, n):
+            best = 1
+            break
+        value = -negamax(opponent, marks, n, -beta, -alpha)
+        if value > best:
+            best = value
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+    if best <= original_alpha:
+        table[key] = (best, UPPER)
+    elif best >= beta:
+        table[key] = (best, LOWER)
+    else:
+        table[key] = (best, EXACT)
+    return best
+
+
+# Adapters with the same interface as tictactoe.py
+
+def initial_state():
+    """
+    Returns starting state of the board.
+    """
+    return [[EMPTY, EMPTY, EMPTY],
+            [EMPTY, EMPTY, EMPTY],
+            [EMPTY, EMPTY, EMPTY]]
+
+
+def player(board):
+    """
+    Returns player who has the next turn on a board.
+    """
+    x, o = to_masks(board)
+    return O if bin(x | o).count("1") % 2 else X
+
+
+def actions(board):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    n = len(board)
+    x, o = to_masks(board)
+    return {divmod(cell, n) for cell in range(n * n) if not (x | o) >> cell & 1}
+
+
+def result(board, action):
+    """
+    Returns the board that results from making move (i, j) on the board.
+    """
+    if terminal(board):
+        raise ValueError("GAME OVER")
+    n = len(board)
+    x, o = to_masks(board)
+    i, j = action
+    move = 1 << (i * n + j)
+    if (x | o) & move:
+        raise ValueError("cell is taken")
+    if player(board) == X:
+        x ^= move
+    else:
+        o ^= move
+    return to_board(x, o, n)
+
+
+def winner(board):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    x, o = to_masks(board)
+    return mask_winner(x, o, lines(len(board))[0])
+
+
+def terminal(board):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    n = len(board)
+    x, o = to_masks(board)
+    return mask_winner(x, o, lines(n)[0]) is not None or x | o == (1 << n * n) - 1
+
+
+def utility(board):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    return utility_of(winner(board))
+
+
+def utility_of(winner):
+    """
+    Returns the utility of a game won by `winner` (X, O or None).
+    """
+    return {X: 1, O: -1, None: 0}[winner]
+
+
+def minimax(board):
+    """
+    Returns the optimal action for the current player on the board.
+    """
+    if terminal(board):
+        return None
+    if board == initial_state():
+        return (random.randint(0, 2), random.randint(0, 2))
+
+    n = len(board)
+    x, o = to_masks(board)
+    mover, opponent = (x, o) if player(board) == X else (o, x)
+    free = ((1 << n * n) - 1) & ~(mover | opponent)
+    best_action = None
+    best = -math.inf
+    while free:
+        move = free & -free
+        free ^= move
+        marks = mover ^ move
+        cell = move.bit_length() - 1
+        if completes_line(marks, cell, n):
+            return divmod(cell, n)
+        value = -negamax(opponent, marks, n, -math.inf, -best)
+        if value > best:
+            best = value
+            best_action = divmod(cell, n)
+    return best_action
@@ -0,0 +1,147 @@
+"""
+Tic Tac Toe opening book
+
+The whole 3 x 3 game is small enough to solve once: running this file
+visits every position reachable from the empty board, keeps one of each
+set of rotations and reflections, and writes the best move on every
+one of them that is not over to book.bin. minimax then answers those
+positions with a lookup instead of a search.
+
+book.bin is a header (MAGIC, the version and the number of positions)
+followed by the base-3 index of each canonical board (see
+tictactoe.canonical) as little-endian 16-bit integers in increasing
+order, then the best move on each, one byte per board, as the cell
+number of the canonical board.
+"""
+
+import bisect
+import math
+import os
+import struct
+import sys
+from array import array
+
+import tictactoe as ttt
+
+BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+MAGIC = b"TTTB"
+VERSION = 1
+HEADER = struct.Struct("<4sHI")
+
+
+class OpeningBook():
+    def __init__(self, indices, moves):
+        self.indices = indices
+        self.moves = moves
+
+    @classmethod
+    def build(cls):
+        """
+        Solves every reachable 3 x 3 position that is not over.
+        """
+        symbols = {code: cell for cell, code in ttt.CELL_CODES.items()}
+        book = {}
+        seen = set()
+        frontier = [ttt.initial_state()]
+        while frontier:
+            board = frontier.pop()
+            cells, _ = ttt.canonical(board)
+            if cells in seen or ttt.terminal(board):
+                continue
+            seen.add(cells)
+
+            # Solve the canonical board itself, so the move is in its cells
+            canonical = [[symbols[code] for code in cells[i:i + 3]] for i in range(0, 9, 3)]
+            book[board_index(cells)] = best_move(canonical)
+            for action in ttt.actions(board):
+                frontier.append(ttt.result(board, action))
+
+        indices = sorted(book)
+        return cls(array("H", indices), array("B", [book[index] for index in indices]))
+
+    @classmethod
+    def load(cls, filename=BOOK_FILE):
+        with open(filename, "rb") as f:
+            magic, version, count = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{filename} is not a version {VERSION} opening book")
+            indices = array("H")
+            indices.frombytes(f.read(2 * count))
+            moves = array("B")
+            moves.frombytes(f.read(count))
+        if len(indices) != count or len(moves) != count:
+            raise ValueError(f"{filename} is truncated")
+        if sys.byteorder == "big":
+            indices.byteswap()
+        return cls(indices, moves)
+
+    def save(self, filename=BOOK_FILE):
+        indices = array("H", self.indices)
+        if sys.byteorder == "big":
+            indices.byteswap()
+        with open(filename, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(indices)))
+            f.write(indices.tobytes())
+            f.write(self.moves.tobytes())
+
+    def move(self, board):
+        """
+        Returns the book move (i, j) for the board, or None if the board
+        is not in the book.
+        """
+        if len(board) != 3 or any(len(row) != 3 for row in board):
+            return None
+        cells, permutation = ttt.canonical(board)
+        index = board_index(cells)
+        position = bisect.bisect_left(self.indices, index)
+        if position == len(self.indices) or self.indices[position] != index:
+            return None
+        return divmod(permutation[self.moves[position]], 3)
+
+
+def board_index(cells):
+    """
+    Returns the board's cell codes read as a base-3 number, first cell lowest.
+    """
+    index = 0
+    for code in reversed(cells):
+        index = index * 3 + code
+    return index
+
+
+def best_move(board):
+    """
+    Returns the cell number of the first optimal move on the board.
+    """
+    maximizing = ttt.player(board) == ttt.X
+    other = ttt.O if maximizing else ttt.X
+    best = None
+    for i, j in sorted(ttt.actions(board)):
+        value = ttt.min_max_value(ttt.result(board, (i, j)), other, -math.inf, math.inf)
+        if best is None or (value > best_value if maximizing else value < best_value):
+            best = i * 3 + j
+            best_value = value
+    return best
+
+
+# Book loaded by book_move, or an empty one if book.bin cannot be read
+book = None
+
+
+def book_move(board):
+    """
+    Returns the move for the board from book.bin, or None.
+    """
+    global book
+    if book is None:
+        try:
+            book = OpeningBook.load()
+        except (OSError, ValueError, struct.error):
+            book = OpeningBook(array("H"), array("B"))
+    return book.move(board)
+
+
+if __name__ == "__main__":
+    opening_book = OpeningBook.build()
+    opening_book.save()
+    print(f"Wrote {len(opening_book.indices)} positions to {BOOK_FILE}")
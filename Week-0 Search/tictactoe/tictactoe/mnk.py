@@ -0,0 +1,334 @@
+"""
+m,n,k Tic Tac Toe Player
+
+An m x n board where the first to get k marks in a row (across, down
+or diagonally) wins: Tic Tac Toe is 3,3,3 and gomoku is 15,15,5.
+
+Searching to the end of the game is hopeless beyond the smallest
+boards, so minimax runs iterative deepening alpha-beta against a
+wall-clock budget: it searches one move ahead, then two, and so on,
+and plays the best move of the deepest search that finished. Positions
+at the search horizon are scored by the lines each side could still
+complete. Moves are tried best first: the best move found for the
+position earlier, then killer moves (moves that caused a cutoff at the
+same depth elsewhere), then by the history heuristic (how often and
+how deep a move has caused cutoffs).
+
+Boards are the same nested lists as in tictactoe.py; the search works
+on one bit mask per side, with the helpers of bitboard.py.
+"""
+
+import math
+import time
+
+import bitboard
+from tictactoe import X, O, EMPTY, EXACT, LOWER, UPPER
+
+# Score of a win; wins sooner score higher
+WIN = 1_000_000
+
+# Default thinking time for each move, in seconds
+BUDGET = 1.0
+
+# Boards with more cells than this only consider moves next to a mark
+LOCAL_MOVES = 16
+
+# Most positions kept in the table; new ones are not added beyond this
+TABLE_SIZE = 1_000_000
+
+
+class Timeout(Exception):
+    pass
+
+
+class Game():
+    X = X
+    O = O
+    EMPTY = EMPTY
+
+    def __init__(self, rows=3, cols=3, k=3, budget=BUDGET):
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.budget = budget
+        self.cells = rows * cols
+        self.full = (1 << self.cells) - 1
+
+        # Masks of every k cells in a row, and those through each cell
+        self.windows = []
+        for i in range(rows):
+            for j in range(cols):
+                for di, dj in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+                    end_i = i + di * (k - 1)
+                    end_j = j + dj * (k - 1)
+                    if 0 <= end_i < rows and 0 <= end_j < cols:
+                        self.windows.append(sum(
+                            1 << ((i + di * step) * cols + j + dj * step) for step in range(k)))
+        self.through = [
+            [window for window in self.windows if window >> cell & 1]
+            for cell in range(self.cells)
+        ]
+
+        # Cells next to each cell, including diagonally
+        self.nearby = []
+        for cell in range(self.cells):
+            i, j = divmod(cell, cols)
+            self.nearby.append(sum(
+                1 << (r * cols + c)
+                for r in range(max(0, i - 1), min(rows, i + 2))
+                for c in range(max(0, j - 1), min(cols, j + 2))
+            ))
+
+        # Score of a window holding only this many of one side's marks
+        self.weights = [0] + [4 ** count for count in range(1, k + 1)]
+
+        # Best move and value of searched positions, keyed by
+        # (mover, opponent): (depth, value, flag, move). Win and loss
+        # scores are stored counting plies from the position itself, so
+        # entries stay right when it comes up nearer the root later on
+        self.table = {}
+
+        # Positions searched by the last call to minimax, and the
+        # depth of its deepest finished search
+        self.nodes = 0
+        self.depth = 0
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.cols for _ in range(self.rows)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        return bitboard.player(board)
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        return {
+            (i, j)
+            for i, row in enumerate(board)
+            for j, cell in enumerate(row)
+            if cell is EMPTY
+        }
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        if self.terminal(board):
+            raise ValueError("GAME OVER")
+        i, j = action
+        if board[i][j] is not EMPTY:
+            raise ValueError("cell is taken")
+        result_board = [row[:] for row in board]
+        result_board[i][j] = self.player(board)
+        return result_board
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        x, o = bitboard.to_masks(board)
+        return bitboard.mask_winner(x, o, self.windows)
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        x, o = bitboard.to_masks(board)
+        return self.winner(board) is not None or x | o == self.full
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        return bitboard.utility_of(self.winner(board))
+
+    def minimax(self, board, budget=None):
+        """
+        Returns the best action for the current player on the board
+        found within the time budget, in seconds.
+        """
+        if self.terminal(board):
+            return None
+        x, o = bitboard.to_masks(board)
+        mover, opponent = (x, o) if self.player(board) == X else (o, x)
+
+        self.deadline = time.perf_counter() + (self.budget if budget is None else budget)
+        self.nodes = 0
+        self.depth = 0
+        self.killers = {}
+        self.history = [0] * self.cells
+
+        # Fall back on the first candidate if not even one move ahead is searched
+        best = self.candidates(mover | opponent)[0]
+        empty = self.cells - bin(mover | opponent).count("1")
+        for depth in range(1, empty + 1):
+            try:
+                value, move = self.search_root(mover, opponent, depth)
+            except Timeout:
+                break
+            best = move
+            self.depth = depth
+
+            # A forced win or loss will not change with more depth
+            if abs(value) > WIN - self.cells:
+                break
+        return divmod(best, self.cols)
+
+    def search_root(self, mover, opponent, depth):
+        alpha = -math.inf
+        best_move = None
+        for cell in self.ordered_moves(mover, opponent, 0):
+            value = self.value_of_move(mover, opponent, cell, depth, alpha, math.inf, 0)
+            if value > alpha:
+                alpha = value
+                best_move = cell
+        self.store((mover, opponent), depth, alpha, EXACT, best_move, 0)
+        return alpha, best_move
+
+    def value_of_move(self, mover, opponent, cell, depth, alpha, beta, ply):
+        marks = mover | 1 << cell
+        for window in self.through[cell]:
+            if marks & window == window:
+                return WIN - ply
+        return -self.search(opponent, marks, depth - 1, -beta, -alpha, ply + 1)
+
+    def search(self, mover, opponent, depth, alpha, beta, ply):
+        """
+        Alpha-beta (negamax) value of the position for the side to move,
+        whose marks are `mover`, searching `depth` moves ahead.
+        """
+        self.nodes += 1
+        if self.nodes % 128 == 0 and time.perf_counter() > self.deadline:
+            raise Timeout
+        if mover | opponent == self.full:
+            return 0
+        if depth == 0:
+            return self.evaluate(mover, opponent)
+
+        key = (mover, opponent)
+        entry = self.table.get(key)
+        if entry is not None and entry[0] >= depth:
+            _, value, flag, _ = entry
+            value = self.from_table(value, ply)
+            if flag == EXACT:
+                return value
+            if flag == LOWER:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value
+
+        original_alpha = alpha
+        best = -math.inf
+        best_move = None
+        for cell in self.ordered_moves(mover, opponent, ply):
+            value = self.value_of_move(mover, opponent, cell, depth, alpha, beta, ply)
+            if value > best:
+                best = value
+                best_move = cell
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                killers = self.killers.setdefault(ply, [])
+                if cell not in killers:
+                    killers.insert(0, cell)
+                    del killers[2:]
+                self.history[cell] += depth * depth
+                break
+
+        if best <= original_alpha:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.store(key, depth, best, flag, best_move, ply)
+        return best
+
+    def store(self, key, depth, value, flag, move, ply):
+        """
+        Records a searched position in the table, unless it is full.
+        """
+        if len(self.table) < TABLE_SIZE or key in self.table:
+            self.table[key] = (depth, self.to_table(value, ply), flag, move)
+
+    def to_table(self, value, ply):
+        """
+        Turns a score counting plies from the root into one counting
+        plies from the position `ply` plies below it.
+        """
+        if value > WIN - self.cells:
+            return value + ply
+        if value < -(WIN - self.cells):
+            return value - ply
+        return value
+
+    def from_table(self, value, ply):
+        """
+        Turns a score from the table back into one counting plies from the root.
+        """
+        if value > WIN - self.cells:
+            return value - ply
+        if value < -(WIN - self.cells):
+            return value + ply
+        return value
+
+    def candidates(self, occupied):
+        """
+        Returns the empty cells worth playing: all of them on small
+        boards, and those next to a mark on big ones.
+        """
+        if occupied == 0 and self.cells > LOCAL_MOVES:
+            return [(self.rows // 2) * self.cols + self.cols // 2]
+        if self.cells <= LOCAL_MOVES:
+            free = self.full & ~occupied
+        else:
+            free = 0
+            marks = occupied
+            while marks:
+                mark = marks & -marks
+                marks ^= mark
+                free |= self.nearby[mark.bit_length() - 1]
+            free &= ~occupied
+        return [cell for cell in range(self.cells) if free >> cell & 1]
+
+    def ordered_moves(self, mover, opponent, ply):
+        """
+        Returns the candidate moves, best first: the table's move, then
+        the killer moves at this ply, then by history score.
+        """
+        moves = self.candidates(mover | opponent)
+        moves.sort(key=lambda cell: -self.history[cell])
+        first = list(self.killers.get(ply, []))
+        entry = self.table.get((mover, opponent))
+        if entry is not None and entry[3] is not None:
+            first.insert(0, entry[3])
+        for cell in reversed(first):
+            if cell in moves:
+                moves.remove(cell)
+                moves.insert(0, cell)
+        return moves
+
+    def evaluate(self, mover, opponent):
+        """
+        Scores a position for the side to move by the windows only one
+        side has marks in, weighted by how full they are.
+        """
+        weights = self.weights
+        score = 0
+        for window in self.windows:
+            mine = mover & window
+            theirs = opponent & window
+            if mine and not theirs:
+                score += weights[bin(mine).count("1")]
+            elif theirs and not mine:
+                score -= weights[bin(theirs).count("1")]
+        return score
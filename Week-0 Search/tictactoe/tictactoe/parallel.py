@@ -0,0 +1,75 @@
+"""
+Parallel root-split search for Tic Tac Toe
+
+minimax(board, workers) searches the first root move itself (the
+"eldest brother") to get a bound on the best value, then hands the
+other root moves, in row-major order, to a pool of worker processes.
+Workers publish the value of each move in shared memory, and a move is
+searched with the best value of the moves before it that are done as
+its alpha (beta for O), so it prunes almost as in a serial search.
+
+Only values of earlier moves are used, never of later ones: a move's
+bound is then never tighter than a serial search would give it, a move
+that falls short of its bound is never better than an earlier one, and
+the move returned is always the first optimal move in row-major order,
+however the work was split and whatever the number of workers.
+"""
+
+import math
+import os
+from multiprocessing import Array, Pool
+
+import tictactoe as ttt
+
+# Values of the root moves, shared with the worker processes; moves not
+# searched yet hold the worst value for the side to move
+values = None
+
+
+def init_worker(shared):
+    global values
+    values = shared
+
+
+def search_move(task):
+    """
+    Returns the value of the root move at `index`, exact if it beats
+    every earlier move.
+    """
+    board, action, index = task
+    child = ttt.result(board, action)
+    if ttt.player(board) == ttt.X:
+        value = ttt.min_max_value(child, ttt.O, max(values[:index]), math.inf)
+    else:
+        value = ttt.min_max_value(child, ttt.X, -math.inf, min(values[:index]))
+    values[index] = value
+    return value
+
+
+def minimax(board, workers=None):
+    """
+    Returns the optimal action for the current player on the board,
+    searching the root moves in `workers` processes (default: one per CPU).
+    """
+    if ttt.terminal(board):
+        return None
+    moves = sorted(ttt.actions(board))
+    maximizing = ttt.player(board) == ttt.X
+    other = ttt.O if maximizing else ttt.X
+
+    # The eldest brother is searched with a full window, before forking,
+    # so the workers also start with its entries in their tables
+    first = ttt.min_max_value(ttt.result(board, moves[0]), other, -math.inf, math.inf)
+    if first == (1 if maximizing else -1) or len(moves) == 1:
+        return moves[0]
+
+    worst = -math.inf if maximizing else math.inf
+    shared = Array("d", [first] + [worst] * (len(moves) - 1))
+    tasks = [(board, move, index) for index, move in enumerate(moves) if index > 0]
+    with Pool(workers or os.cpu_count(), initializer=init_worker, initargs=(shared,)) as pool:
+        results = [first] + pool.map(search_move, tasks, chunksize=1)
+
+    # First move with the best value; moves that fell short of their
+    # bound are no better than an earlier move
+    sign = 1 if maximizing else -1
+    return max(zip(moves, results), key=lambda move_value: sign * move_value[1])[0]
@@ -3,6 +3,14 @@ import sys
 import time
 
 import tictactoe as ttt
+from mnk import Game
+
+# Play on a bigger board, with a time limit for the computer, given
+# rows, columns and how many in a row win
+if len(sys.argv) == 4:
+    ttt = Game(*(int(arg) for arg in sys.argv[1:]))
+elif len(sys.argv) != 1:
+    sys.exit("Usage: python runner.py [rows cols k]")
 
 pygame.init()
 size = width, height = 600, 400
@@ -15,10 +23,14 @@ screen = pygame.display.set_mode(size)
 
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
-moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
 user = None
 board = ttt.initial_state()
+rows, cols = len(board), len(board[0])
+
+# Fit the board between the title and the button below it
+tile_size = min(80, (height - 140) / rows, (width - 40) / cols)
+moveFont = pygame.font.Font("OpenSans-Regular.ttf", int(tile_size * 0.75))
 ai_turn = False
 
 while True:
@@ -67,13 +79,12 @@ while True:
     else:
 
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        tile_origin = (width / 2 - (cols / 2 * tile_size),
+                       height / 2 - (rows / 2 * tile_size))
         tiles = []
-        for i in range(3):
+        for i in range(rows):
             row = []
-            for j in range(3):
+            for j in range(cols):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
@@ -122,8 +133,8 @@ while True:
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(rows):
+                for j in range(cols):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
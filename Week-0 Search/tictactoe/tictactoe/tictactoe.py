@@ -4,12 +4,160 @@ Tic Tac Toe Player
 
 import math
 import random
-import copy
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# How a transposition table value relates to the true minimax value
+EXACT = "exact"
+LOWER = "lower"
+UPPER = "upper"
+
+CELL_CODES = {EMPTY: 0, X: 1, O: 2}
+
+
+class TranspositionTable():
+    """
+    Minimax values of boards already searched, shared by boards that are
+    rotations or reflections of each other. An entry is (value, flag,
+    move): alpha-beta only proves a bound on a value outside its window,
+    so flag says whether value is EXACT or a LOWER or UPPER bound. move
+    is the best move found, as a cell index on the canonical board.
+    """
+    def __init__(self):
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def put(self, key, value, flag, move=None):
+        self.entries[key] = (value, flag, move)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """
+        Returns the number of entries, hits and misses, and the hit rate.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+table = TranspositionTable()
+
+# Cell permutations of the 8 symmetries of an n x n board, for each n
+symmetry_cache = {}
+
+
+def symmetries(n):
+    """
+    Returns the 8 rotations and reflections of an n x n board, each as a
+    list giving the (flat) board cell that lands on each cell.
+    """
+    if n not in symmetry_cache:
+        last = n - 1
+        transforms = [
+            lambda i, j: (i, j), lambda i, j: (j, last - i),
+            lambda i, j: (last - i, last - j), lambda i, j: (last - j, i),
+            lambda i, j: (i, last - j), lambda i, j: (last - i, j),
+            lambda i, j: (j, i), lambda i, j: (last - j, last - i),
+        ]
+        symmetry_cache[n] = [
+            [r * n + c for r, c in (transform(i, j) for i in range(n) for j in range(n))]
+            for transform in transforms
+        ]
+    return symmetry_cache[n]
+
+
+def canonical(board):
+    """
+    Returns (key, symmetry) for the board: key is the same for every
+    rotation and reflection of it, and symmetry is the permutation that
+    turns the board into the canonical one.
+    """
+    cells = [CELL_CODES[cell] for row in board for cell in row]
+    return min(
+        (tuple([cells[k] for k in permutation]), permutation)
+        for permutation in symmetries(len(board))
+    )
+
+# Lines through each cell of an n x n board, for each n
+line_cache = {}
+
+
+def lines_through(n):
+    """
+    Returns, for each (flat) cell of an n x n board, the indices of the
+    lines through it: rows are 0 to n - 1, columns n to 2n - 1, then the
+    diagonal and the anti-diagonal.
+    """
+    if n not in line_cache:
+        line_cache[n] = [
+            [i, n + j] + ([2 * n] if i == j else []) + ([2 * n + 1] if i + j == n - 1 else [])
+            for i in range(n) for j in range(n)
+        ]
+    return line_cache[n]
+
+
+class LineCounts():
+    """
+    How many marks each player has in every row, column and diagonal of
+    a board, kept up to date as moves are played and taken back. A move
+    only changes the lines through its cell, so the winner and whether
+    the board is full are known without rescanning the board.
+    """
+    def __init__(self, board):
+        self.n = len(board)
+        self.through = lines_through(self.n)
+        self.counts = {X: [0] * (2 * self.n + 2), O: [0] * (2 * self.n + 2)}
+        self.filled = 0
+        self.winner = None
+        for i, row in enumerate(board):
+            for j, cell in enumerate(row):
+                if cell is not EMPTY:
+                    self.play(i, j, cell)
+
+    def play(self, i, j, mark):
+        counts = self.counts[mark]
+        for line in self.through[i * self.n + j]:
+            counts[line] += 1
+            if counts[line] == self.n:
+                self.winner = mark
+        self.filled += 1
+
+    def undo(self, i, j, mark):
+        counts = self.counts[mark]
+        for line in self.through[i * self.n + j]:
+            counts[line] -= 1
+        self.filled -= 1
+        self.winner = None
+
+    def terminal(self):
+        return self.winner is not None or self.filled == self.n * self.n
+
+    def utility(self):
+        if self.winner == X:
+            return 1
+        elif self.winner == O:
+            return -1
+        return 0
+
 #added_helping_functions
 def get_horizontal_winner(board):
     winner_val = None
@@ -58,12 +206,46 @@ def get_diagonal_winner(board):
 
 def min_max_value(board,player,alpha,beta):
     #fto get minimum/maximum value
-    if terminal(board):
-        return utility(board)
+    # Search a copy of the board, making and taking back moves on it
+    board = [row[:] for row in board]
+    return state_value(board, LineCounts(board), player, alpha, beta)
+
+
+def state_value(board, counts, player, alpha, beta):
+    #minimax value of the board, whose line counts are kept in counts
+    if counts.terminal():
+        return counts.utility()
+
+    # Reuse an earlier search of this board or a symmetric one
+    key, _ = canonical(board)
+    entry = table.get(key)
+    if entry is not None:
+        value, flag, _ = entry
+        if flag == EXACT:
+            return value
+        if flag == LOWER:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            return value
+
+    v = search_value(board, counts, player, alpha, beta)
+    if v <= alpha:
+        table.put(key, v, UPPER)
+    elif v >= beta:
+        table.put(key, v, LOWER)
+    else:
+        table.put(key, v, EXACT)
+    return v
+
+
+def search_value(board, counts, player, alpha, beta):
+    #alpha-beta over the children of the board, each looked up in the table first
     if player== X:
         v= -math.inf
         for action in actions(board):
-            v=max(v,min_max_value(result(board,action),O,alpha,beta))
+            v=max(v,child_value(board,counts,action,X,alpha,beta))
             alpha=max(v,alpha)
             if alpha >= beta:
                 break
@@ -72,12 +254,23 @@ def min_max_value(board,player,alpha,beta):
 
         v= math.inf
         for action in actions(board):
-            v=min(v,min_max_value(result(board,action),X, alpha, beta))
+            v=min(v,child_value(board,counts,action,O,alpha,beta))
             beta=min(v,beta)
             if alpha >= beta:
                 break
         return v
 
+
+def child_value(board, counts, action, player, alpha, beta):
+    #value of player moving at action, with the move taken back afterwards
+    (i, j) = action
+    board[i][j] = player
+    counts.play(i, j, player)
+    v = state_value(board, counts, O if player == X else X, alpha, beta)
+    counts.undo(i, j, player)
+    board[i][j] = EMPTY
+    return v
+
 #existing tictactoe functions
 def initial_state():
     """
@@ -124,7 +317,7 @@ def result(board, action):
     if terminal(board):
         raise ValueError("GAME OVER")
     else:
-        result_board = copy.deepcopy(board)
+        result_board = [row[:] for row in board]
         current_player = player(result_board)
         (i, j) = action
         result_board[i][j]=current_player
@@ -169,12 +362,31 @@ def utility(board):
 
 
 
-def minimax(board):
+def minimax(board, workers=None):
     """
     Returns the optimal action for the current player on the board.
+    Given workers, the root moves are searched in that many processes.
     """
     if board == initial_state():
        return(random.randint(0,2), random.randint(0,2))
+
+    # Play from the opening book, if it has the board
+    from book import book_move
+    move = book_move(board)
+    if move is not None:
+        return move
+
+    # Answer from the table if this board (or a symmetric one) was solved
+    key, permutation = canonical(board)
+    entry = table.get(key)
+    if entry is not None and entry[2] is not None:
+        return divmod(permutation[entry[2]], len(board))
+
+    # Split the root moves between processes, if asked to
+    if workers is not None:
+        from parallel import minimax as parallel_minimax
+        return parallel_minimax(board, workers)
+
     current_player = player(board)
     alpha = -math.inf
     beta  = math.inf
@@ -197,6 +409,9 @@ def minimax(board):
             if val > result_maxvalue:
                 val = result_maxvalue
                 action_to_return = action
-    
+
+    if action_to_return is not None:
+        i, j = action_to_return
+        table.put(key, val, EXACT, permutation.index(i * len(board) + j))
     return action_to_return
 